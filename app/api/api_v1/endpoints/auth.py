@@ -2,7 +2,8 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 from app.api import deps
@@ -20,9 +21,24 @@ class UserCreate(BaseModel):
     full_name: str
     role: UserRole = UserRole.VIEWER
 
+class UserActiveUpdate(BaseModel):
+    is_active: bool
+
+class UserRoleUpdate(BaseModel):
+    role: UserRole
+
+async def _get_user_or_404(db: AsyncSession, user_id: int) -> User:
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
 @router.post("/login")
 async def login(
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
@@ -60,13 +76,14 @@ async def login(
 @router.post("/register")
 async def register(
     user_in: UserCreate,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """
     Register new user.
     """
     # Check if user exists
-    user = db.query(User).filter(User.username == user_in.username).first()
+    result = await db.execute(select(User).where(User.username == user_in.username))
+    user = result.scalars().first()
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -125,11 +142,40 @@ async def refresh_token(
 @router.post("/reset-api-key")
 async def reset_api_key(
     current_user: User = Depends(deps.get_current_active_user),
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
 ) -> Any:
     """
     Reset user's API key.
     """
-    current_user.api_key = auth_service.generate_api_key()
-    db.commit()
-    return {"api_key": current_user.api_key} 
\ No newline at end of file
+    # current_user may come from the principal cache, so update by id
+    api_key = await auth_service.reset_api_key(db, current_user)
+    return {"api_key": api_key} 
+
+@router.put("/users/{user_id}/active")
+async def update_user_active(
+    user_id: int,
+    user_in: UserActiveUpdate,
+    current_user: User = Depends(deps.get_current_admin_user),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    Activate or deactivate a user. Goes through the auth service so the user's
+    cached tokens and API keys are dropped and the change applies to their next request.
+    """
+    user = await _get_user_or_404(db, user_id)
+    await auth_service.set_user_active(db, user, user_in.is_active)
+    return {"username": user.username, "is_active": user_in.is_active}
+
+@router.put("/users/{user_id}/role")
+async def update_user_role(
+    user_id: int,
+    user_in: UserRoleUpdate,
+    current_user: User = Depends(deps.get_current_admin_user),
+    db: AsyncSession = Depends(deps.get_db),
+) -> Any:
+    """
+    Change a user's role. Like deactivation, it applies to the user's next request.
+    """
+    user = await _get_user_or_404(db, user_id)
+    await auth_service.set_user_role(db, user, user_in.role)
+    return {"username": user.username, "role": user_in.role}
\ No newline at end of file
@@ -1,25 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from typing import Dict, List, Optional
 from app.services.intercom_service import IntercomService
 from app.services.detection_service import DetectionService
+from app.services.delivery_service import DeliveryService
+from app.services.stats_service import StatsService
+from app.schemas.detection import DetectionBatchRequest, DetectionBatchResponse
+from app.schemas.intercom import IntercomWebhookPayload
+from app.api.deps import get_current_user, get_db
+from app.models.user import User
 from app.core.config import settings
+from app.core.metrics import metrics
 import hmac
 import hashlib
 import json
 
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as WebhookResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as WebhookResponse
+
 router = APIRouter()
 intercom_service = IntercomService()
+delivery_service = DeliveryService(intercom_service)
+stats_service = StatsService()
 detection_service = DetectionService()
 
-async def verify_intercom_signature(request: Request) -> bool:
+def verify_intercom_signature(body: bytes, signature: Optional[str]) -> bool:
     """
-    Verify the Intercom webhook signature.
+    Verify the Intercom webhook signature over the raw request body.
     """
-    signature = request.headers.get("X-Hub-Signature")
     if not signature:
         return False
     
-    body = await request.body()
     expected_signature = hmac.new(
         settings.INTERCOM_ACCESS_TOKEN.encode(),
         body,
@@ -28,20 +43,37 @@ async def verify_intercom_signature(request: Request) -> bool:
     
     return hmac.compare_digest(signature, expected_signature)
 
-@router.post("/webhook")
+@router.post("/webhook", response_class=WebhookResponse)
 async def handle_intercom_webhook(request: Request):
     """
     Handle incoming Intercom webhook events.
+    The body is read once; the same bytes are used for the signature check and
+    parsed straight into the typed payload.
     """
-    if not await verify_intercom_signature(request):
+    body = await request.body()
+    with metrics.time("signature"):
+        is_valid = verify_intercom_signature(body, request.headers.get("X-Hub-Signature"))
+    if not is_valid:
         raise HTTPException(status_code=401, detail="Invalid signature")
     
-    payload = await request.json()
+    try:
+        with metrics.time("json_parse"):
+            payload = IntercomWebhookPayload.model_validate_json(body)
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
     topic = request.headers.get("X-Intercom-Topic")
     
     if topic == "conversation.created" or topic == "conversation.replied":
-        message_data = payload.get("data", {}).get("item", {})
+        message_data = payload.data.item.model_dump()
         processed_data = await intercom_service.process_message(message_data)
+        stats_service.record_message(
+            processed_data["findings"],
+            processed_data["should_block"],
+            processed_data["processing_time"]
+        )
+        if metrics.enabled:
+            for finding in processed_data["findings"]:
+                metrics.inc("findings_total", finding_type=finding["finding_type"])
         
         if processed_data["should_block"]:
             # Block the message and notify admin
@@ -49,27 +81,54 @@ async def handle_intercom_webhook(request: Request):
             return {"status": "blocked", "message": "Message blocked due to sensitive content"}
         
         # If message is not blocked, update it with masked content
-        await intercom_service.send_message(
-            processed_data["conversation_id"],
-            processed_data["processed_text"]
-        )
+        if settings.INTERCOM_OUTBOX_ENABLED:
+            # Acknowledge now; the reply is sent by the background delivery workers
+            with metrics.time("db_write"):
+                await delivery_service.enqueue(
+                    processed_data["conversation_id"],
+                    processed_data["processed_text"]
+                )
+            return {"status": "queued", "findings": processed_data["findings"]}
+
+        with metrics.time("send_message"):
+            await intercom_service.send_message(
+                processed_data["conversation_id"],
+                processed_data["processed_text"]
+            )
         
         return {"status": "processed", "findings": processed_data["findings"]}
     
     return {"status": "ignored", "topic": topic}
 
+@router.post("/detect/batch", response_model=DetectionBatchResponse, response_model_exclude_none=True)
+def detect_batch(
+    batch: DetectionBatchRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Detect sensitive data in many texts in one call, e.g. for backfills and re-scans.
+    Findings are returned column-wise; text_index refers to the position in texts.
+    Declared without async so FastAPI runs the CPU-bound scan in its threadpool
+    instead of on the event loop.
+    """
+    if len(batch.texts) > settings.DETECTION_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large, at most {settings.DETECTION_BATCH_MAX_SIZE} texts per call"
+        )
+
+    return detection_service.detect_many(batch.texts, include_masked=batch.include_masked)
+
 @router.get("/stats")
-async def get_detection_stats():
+async def get_detection_stats(
+    hours: int = Query(24, ge=1, le=24 * 31),
+    db: AsyncSession = Depends(get_db)
+):
     """
     Get statistics about sensitive data detection.
+    Reads the precomputed rollups only: all-time totals plus the last `hours` hours.
     """
-    # TODO: Implement statistics gathering from database
-    return {
-        "total_messages_processed": 0,
-        "total_sensitive_data_found": 0,
-        "blocked_messages": 0,
-        "detection_types": {}
-    }
+    return await stats_service.get_stats(db, hours=hours)
 
 @router.post("/train")
 async def train_model(training_data: List[Dict]):
@@ -89,6 +148,14 @@ async def get_detection_patterns():
         "web3_patterns": detection_service.web3_patterns
     }
 
+@router.get("/patterns/prefilter-stats")
+async def get_prefilter_stats():
+    """
+    Get per-pattern skip rates of the detection prefilter.
+    """
+    # Webhook traffic goes through the IntercomService detector
+    return intercom_service.detection_service.get_prefilter_stats()
+
 @router.post("/patterns")
 async def update_detection_patterns(patterns: Dict):
     """
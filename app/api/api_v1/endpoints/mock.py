@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 import random
 from app.api.deps import get_current_user, get_db
@@ -95,7 +95,7 @@ def generate_mock_message():
 async def get_mock_vault_entries(
     limit: int = 10,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get mock recent activity for the dashboard
@@ -156,7 +156,7 @@ async def get_mock_vault_entries(
 @router.get("/vault/stats")
 async def get_mock_vault_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get mock statistics for the dashboard
@@ -173,7 +173,7 @@ async def get_mock_vault_stats(
 async def add_mock_feedback(
     entry_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Mock endpoint for adding feedback
@@ -184,7 +184,7 @@ async def add_mock_feedback(
 async def archive_mock_entry(
     entry_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Mock endpoint for archiving entries
@@ -195,7 +195,7 @@ async def archive_mock_entry(
 async def revert_mock_redaction(
     entry_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Mock endpoint for reverting a redaction.
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime
 from app.api.deps import get_current_user, get_db
 from app.models.user import User
 from app.models.vault import VaultEntry, VaultFeedback
 from app.services.vault_service import VaultService
-from app.schemas.vault import VaultEntryCreate, VaultEntryResponse, VaultFeedbackCreate
+from app.core.config import settings
+from app.schemas.vault import (
+    VaultEntryCreate, VaultEntryResponse, VaultEntryPage, VaultEntryBulkCreate,
+    VaultEntryBulkResponse, VaultFeedbackCreate
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,7 +22,7 @@ vault_service = VaultService()
 async def create_vault_entry(
     entry: VaultEntryCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new vault entry.
@@ -45,11 +51,51 @@ async def create_vault_entry(
             detail="Internal server error"
         )
 
+@router.post("/entries/bulk", response_model=VaultEntryBulkResponse)
+async def create_vault_entries_bulk(
+    bulk: VaultEntryBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create vault entries for many stored messages at once.
+    Messages that already have a vault entry are skipped.
+    """
+    try:
+        if not current_user.has_permission("vault:create"):
+            logger.warning(f"User {current_user.username} attempted to create vault entries without permission")
+            raise HTTPException(
+                status_code=403,
+                detail="Not enough permissions"
+            )
+        if len(bulk.message_ids) > settings.VAULT_BULK_MAX_MESSAGES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many messages, at most {settings.VAULT_BULK_MAX_MESSAGES} per call"
+            )
+
+        messages = await vault_service.get_messages_without_vault_entry(db, bulk.message_ids)
+        entry_ids = await vault_service.create_vault_entries_bulk(db, messages)
+        logger.info(f"Created {len(entry_ids)} vault entries in bulk")
+        return {
+            "created": len(entry_ids),
+            "skipped": len(set(bulk.message_ids)) - len(entry_ids),
+            "ids": entry_ids
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating vault entries in bulk: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error"
+        )
+
 @router.get("/entries/{entry_id}", response_model=VaultEntryResponse)
 async def get_vault_entry(
     entry_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific vault entry.
@@ -81,15 +127,69 @@ async def get_vault_entry(
             detail="Internal server error"
         )
 
-@router.get("/entries", response_model=List[VaultEntryResponse])
+@router.get("/view/{secure_id}")
+async def view_vault_entry(
+    secure_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Resolve a vault link token to its entry.
+    """
+    try:
+        if not current_user.has_permission("vault:read"):
+            logger.warning(f"User {current_user.username} attempted to read vault entry without permission")
+            raise HTTPException(
+                status_code=403,
+                detail="Not enough permissions"
+            )
+
+        try:
+            vault_service.parse_secure_id(secure_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=404,
+                detail="Vault entry not found"
+            )
+
+        entry = await vault_service.get_vault_entry(db, secure_id)
+        if not entry:
+            raise HTTPException(
+                status_code=404,
+                detail="Vault entry not found"
+            )
+
+        return {
+            "id": entry.id,
+            "message_id": entry.message_id,
+            "conversation_id": entry.conversation_id,
+            "user_id": entry.user_id,
+            "original_message": entry.original_message,
+            "vault_link": vault_service.build_vault_link(entry.secure_id),
+            "created_at": entry.created_at,
+            "metadata": entry.entry_metadata
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resolving vault link: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error"
+        )
+
+@router.get("/entries", response_model=VaultEntryPage)
 async def list_vault_entries(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    conversation_id: Optional[str] = None,
+    user_id: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    List all vault entries.
+    List vault entries, newest first.
+    Pass next_cursor from the previous response as cursor to get the next page.
     """
     try:
         if not current_user.has_permission("vault:read"):
@@ -99,13 +199,20 @@ async def list_vault_entries(
                 detail="Not enough permissions"
             )
         
-        entries = await vault_service.list_vault_entries(
+        entries, next_cursor = await vault_service.list_vault_entries(
             db=db,
-            skip=skip,
-            limit=limit
+            conversation_id=conversation_id,
+            user_id=user_id,
+            cursor=cursor,
+            page_size=limit
         )
         logger.info(f"Retrieved {len(entries)} vault entries")
-        return entries
+        return {"entries": entries, "next_cursor": next_cursor}
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -115,12 +222,48 @@ async def list_vault_entries(
             detail="Internal server error"
         )
 
+@router.get("/export")
+async def export_vault_entries(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    conversation_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    is_archived: Optional[bool] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream a full export of vault entries as NDJSON or CSV.
+    Omitting is_archived exports both active and archived entries.
+    """
+    if not current_user.has_permission("vault:export"):
+        logger.warning(f"User {current_user.username} attempted to export vault entries without permission")
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions"
+        )
+
+    logger.info(f"User {current_user.username} started a {format} vault export")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        vault_service.export_vault_entries(
+            export_format=format,
+            conversation_id=conversation_id,
+            user_id=user_id,
+            created_from=created_from,
+            created_to=created_to,
+            is_archived=is_archived
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=vault_export.{format}"}
+    )
+
 @router.post("/entries/{entry_id}/feedback")
 async def add_feedback(
     entry_id: int,
     feedback: VaultFeedbackCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Add feedback to a vault entry.
@@ -154,7 +297,7 @@ async def add_feedback(
 async def archive_vault_entry(
     entry_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Archive a vault entry.
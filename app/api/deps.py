@@ -1,27 +1,25 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal
 from app.models.user import User, UserRole
 from app.services.auth_service import AuthService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 auth_service = AuthService()
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     credentials_exception = HTTPException(
@@ -39,9 +37,16 @@ async def get_current_user(
     except (jwt.JWTError, ValidationError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    # The token is still decoded above so expiry is always enforced
+    user = auth_service.get_cached_principal(token)
+    if user is not None:
+        return user
+
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
+    auth_service.cache_principal(token, user)
     return user
 
 async def get_current_active_user(
@@ -73,12 +78,17 @@ def get_current_reviewer_user(
 
 async def get_api_key_user(
     api_key: str = Security(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
+    user = auth_service.get_cached_principal(api_key)
+    if user is not None:
+        return user
+
     user = await auth_service.get_user_by_api_key(db, api_key)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key"
         )
+    auth_service.cache_principal(api_key, user)
     return user 
\ No newline at end of file
@@ -13,13 +13,35 @@ class Settings(BaseSettings):
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-secret-key")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))  # existing hashes are rehashed on login when this changes
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    CREDENTIAL_CACHE_TTL_SECONDS: int = int(os.getenv("CREDENTIAL_CACHE_TTL_SECONDS", "300"))  # 0 disables the cache
+    CREDENTIAL_CACHE_MAX_SIZE: int = int(os.getenv("CREDENTIAL_CACHE_MAX_SIZE", "1024"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))  # 0 disables the cache
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "4096"))
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")  # derived from DATABASE_URL when empty
     
     # Intercom
     INTERCOM_ACCESS_TOKEN: str = os.getenv("INTERCOM_ACCESS_TOKEN", "")
     INTERCOM_WEBHOOK_SECRET: str = os.getenv("INTERCOM_WEBHOOK_SECRET", "")
+    INTERCOM_API_BASE_URL: str = os.getenv("INTERCOM_API_BASE_URL", "https://api.intercom.io")
+    INTERCOM_HTTP2: bool = os.getenv("INTERCOM_HTTP2", "false").lower() == "true"  # requires the h2 package
+    INTERCOM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("INTERCOM_HTTP_MAX_CONNECTIONS", "100"))
+    INTERCOM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("INTERCOM_HTTP_MAX_KEEPALIVE", "20"))
+    INTERCOM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("INTERCOM_HTTP_KEEPALIVE_EXPIRY", "30"))
+    INTERCOM_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("INTERCOM_HTTP_CONNECT_TIMEOUT", "5"))
+    INTERCOM_HTTP_TIMEOUT: float = float(os.getenv("INTERCOM_HTTP_TIMEOUT", "10"))
+    INTERCOM_OUTBOX_ENABLED: bool = os.getenv("INTERCOM_OUTBOX_ENABLED", "true").lower() == "true"
+    INTERCOM_DELIVERY_CONCURRENCY: int = int(os.getenv("INTERCOM_DELIVERY_CONCURRENCY", "4"))
+    INTERCOM_RATE_LIMIT_PER_SECOND: float = float(os.getenv("INTERCOM_RATE_LIMIT_PER_SECOND", "16"))
+    INTERCOM_RATE_LIMIT_BURST: int = int(os.getenv("INTERCOM_RATE_LIMIT_BURST", "20"))
+    INTERCOM_DELIVERY_MAX_ATTEMPTS: int = int(os.getenv("INTERCOM_DELIVERY_MAX_ATTEMPTS", "8"))
+    INTERCOM_DELIVERY_BACKOFF_BASE: float = float(os.getenv("INTERCOM_DELIVERY_BACKOFF_BASE", "1"))
+    INTERCOM_DELIVERY_BACKOFF_MAX: float = float(os.getenv("INTERCOM_DELIVERY_BACKOFF_MAX", "300"))
+    INTERCOM_DELIVERY_CLAIM_TIMEOUT: float = float(os.getenv("INTERCOM_DELIVERY_CLAIM_TIMEOUT", "300"))  # seconds before another worker may retake a claimed message
     
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -28,20 +50,48 @@ class Settings(BaseSettings):
     MODEL_CONFIDENCE_THRESHOLD: float = float(os.getenv("MODEL_CONFIDENCE_THRESHOLD", "0.85"))
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "1000"))
     MODEL_VERSION: str = os.getenv("MODEL_VERSION", "1.0.0")
+    ML_MODEL_ARCHITECTURE: str = os.getenv("ML_MODEL_ARCHITECTURE", "bert-base")  # bert-base, distilbert, minilm or tfidf
+    ML_MAX_SEQUENCE_LENGTH: int = int(os.getenv("ML_MAX_SEQUENCE_LENGTH", "512"))
+    ML_EVAL_BATCH_SIZE: int = int(os.getenv("ML_EVAL_BATCH_SIZE", "32"))
+    ML_EVAL_BUCKET_BATCHES: int = int(os.getenv("ML_EVAL_BUCKET_BATCHES", "50"))  # batches read and length-sorted together
+    ML_BATCH_MAX_SIZE: int = int(os.getenv("ML_BATCH_MAX_SIZE", "16"))
+    ML_BATCH_MAX_WAIT_MS: float = float(os.getenv("ML_BATCH_MAX_WAIT_MS", "10"))
+    ML_INFERENCE_TIMEOUT_SECONDS: float = float(os.getenv("ML_INFERENCE_TIMEOUT_SECONDS", "5"))
+    ML_INFERENCE_BACKEND: str = os.getenv("ML_INFERENCE_BACKEND", "pytorch")  # pytorch, quantized or onnx
+    ML_TORCH_THREADS: int = int(os.getenv("ML_TORCH_THREADS", "0"))  # 0 keeps torch's default
+    ML_DISTILL_TEMPERATURE: float = float(os.getenv("ML_DISTILL_TEMPERATURE", "2.0"))
+    ML_DISTILL_ALPHA: float = float(os.getenv("ML_DISTILL_ALPHA", "0.5"))  # weight of the teacher loss vs. the label loss
+    ML_DISTILL_EPOCHS: int = int(os.getenv("ML_DISTILL_EPOCHS", "3"))
+    ML_DISTILL_LEARNING_RATE: float = float(os.getenv("ML_DISTILL_LEARNING_RATE", "5e-5"))
+    ML_DISTILL_BATCH_SIZE: int = int(os.getenv("ML_DISTILL_BATCH_SIZE", "16"))
     
     # DLP Settings
     BLOCK_EXTERNAL_MESSAGES: bool = os.getenv("BLOCK_EXTERNAL_MESSAGES", "true").lower() == "true"
     NOTIFY_ADMIN_ON_BLOCK: bool = os.getenv("NOTIFY_ADMIN_ON_BLOCK", "true").lower() == "true"
-    ENABLE_ML_DETECTION: bool = os.getenv("ENABLE_ML_DETECTION", "true").lower() == "true"
+    ENABLE_ML_DETECTION: bool = os.getenv("ENABLE_ML_DETECTION", "false").lower() == "true"
     ENABLE_REGEX_DETECTION: bool = os.getenv("ENABLE_REGEX_DETECTION", "true").lower() == "true"
+    DETECTION_BATCH_MAX_SIZE: int = int(os.getenv("DETECTION_BATCH_MAX_SIZE", "10000"))
+    DETECTION_THREAD_WORKERS: int = int(os.getenv("DETECTION_THREAD_WORKERS", "4"))
+    DETECTION_PROCESS_WORKERS: int = int(os.getenv("DETECTION_PROCESS_WORKERS", "2"))  # 0 disables the process pool
+    DETECTION_PROCESS_THRESHOLD_CHARS: int = int(os.getenv("DETECTION_PROCESS_THRESHOLD_CHARS", "20000"))
+    STATS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("STATS_FLUSH_INTERVAL_SECONDS", "10"))
     
     # Vault Settings
     VAULT_BASE_URL: str = os.getenv("VAULT_BASE_URL", "https://vault.example.com")
     VAULT_RETENTION_DAYS: int = int(os.getenv("VAULT_RETENTION_DAYS", "30"))
+    VAULT_RETENTION_ENABLED: bool = os.getenv("VAULT_RETENTION_ENABLED", "false").lower() == "true"  # run the sweeper in the app
+    VAULT_RETENTION_MODE: str = os.getenv("VAULT_RETENTION_MODE", "purge")  # 'purge' or 'archive'
+    VAULT_RETENTION_CHUNK_SIZE: int = int(os.getenv("VAULT_RETENTION_CHUNK_SIZE", "500"))
+    VAULT_RETENTION_CHUNK_DELAY_SECONDS: float = float(os.getenv("VAULT_RETENTION_CHUNK_DELAY_SECONDS", "0.1"))
+    VAULT_RETENTION_INTERVAL_SECONDS: int = int(os.getenv("VAULT_RETENTION_INTERVAL_SECONDS", "3600"))
+    VAULT_EXPORT_BATCH_SIZE: int = int(os.getenv("VAULT_EXPORT_BATCH_SIZE", "1000"))
+    VAULT_BULK_INSERT_BATCH_SIZE: int = int(os.getenv("VAULT_BULK_INSERT_BATCH_SIZE", "500"))
+    VAULT_BULK_MAX_MESSAGES: int = int(os.getenv("VAULT_BULK_MAX_MESSAGES", "10000"))
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     ENABLE_ACCESS_LOGS: bool = os.getenv("ENABLE_ACCESS_LOGS", "true").lower() == "true"
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "false").lower() == "true"  # exposes /metrics
     
     class Config:
         case_sensitive = True
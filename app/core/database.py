@@ -1,7 +1,8 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
 import logging
 
@@ -29,6 +30,37 @@ except Exception as e:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver (aiosqlite / asyncpg).
+    """
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    return url
+
+# Async engine used by all request paths; the sync engine above is kept for
+# table creation, scripts and model training
+try:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL),
+        poolclass=AsyncAdaptedQueuePool,  # aiosqlite would otherwise default to NullPool
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800
+    )
+    logger.info("Async database engine created successfully")
+except Exception as e:
+    logger.error(f"Error creating async database engine: {e}")
+    raise
+
+# expire_on_commit=False so objects stay readable after commit without another awaited load
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -40,4 +72,4 @@ def get_db():
         logger.error(f"Database session error: {e}")
         raise
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
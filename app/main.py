@@ -1,10 +1,19 @@
+import time
+
+# Measured from here so the startup report includes import time
+_process_started = time.perf_counter()
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
 from app.api.api_v1.api import api_router
-from app.core.database import engine, Base
+from app.api.api_v1.endpoints.intercom import intercom_service, delivery_service, stats_service
+from app.core.database import engine, async_engine, Base
+from app.core.metrics import metrics
+from app.services.retention_service import RetentionService
 import logging
+import sys
 
 # Configure logging
 logging.basicConfig(
@@ -13,14 +22,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+startup_report = {"imports_seconds": round(time.perf_counter() - _process_started, 3)}
+
 # Create database tables
 try:
+    _tables_started = time.perf_counter()
     Base.metadata.create_all(bind=engine)
+    startup_report["create_tables_seconds"] = round(time.perf_counter() - _tables_started, 3)
     logger.info("Database tables created successfully")
 except Exception as e:
     logger.error(f"Error creating database tables: {e}")
     raise
 
+retention_service = RetentionService()
+
 app = FastAPI(
     title="Intercom Data Security System",
     description="AI-powered Data Security & DLP system for Intercom",
@@ -40,6 +55,59 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+def _database_pool_stats():
+    values = {}
+    for label, pool in (("sync", engine.pool), ("async", async_engine.pool)):
+        values[(("engine", label), ("state", "size"))] = pool.size()
+        values[(("engine", label), ("state", "checked_out"))] = pool.checkedout()
+        values[(("engine", label), ("state", "checked_in"))] = pool.checkedin()
+        values[(("engine", label), ("state", "overflow"))] = pool.overflow()
+    return values
+
+if metrics.enabled:
+    metrics.describe("stage_duration_seconds", "Time spent per webhook processing stage")
+    metrics.describe("findings_total", "Sensitive data findings by type")
+    metrics.describe("intercom_delivery_errors_total", "Failed Intercom reply attempts by status code")
+    metrics.describe("ml_inference_batches_total", "ML classifier forward passes")
+    metrics.describe("ml_inference_messages_total", "Messages classified by the ML classifier")
+    metrics.register_gauge(
+        "database_pool_connections",
+        "SQLAlchemy connection pool state",
+        _database_pool_stats
+    )
+    metrics.register_gauge(
+        "intercom_http_connections",
+        "Intercom HTTP client connection pool state",
+        lambda: {(("state", state),): value for state, value in intercom_service.connection_pool_stats().items()}
+    )
+    metrics.register_gauge(
+        "intercom_outbox_queue_size",
+        "Outbox messages waiting for a delivery worker",
+        lambda: {(): delivery_service.queue_size()}
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    started = time.perf_counter()
+    await intercom_service.startup()
+    startup_report["intercom_service_seconds"] = round(time.perf_counter() - started, 3)
+    await delivery_service.start()
+    stats_service.start()
+    if settings.VAULT_RETENTION_ENABLED:
+        retention_service.start()
+    startup_report["startup_hooks_seconds"] = round(time.perf_counter() - started, 3)
+    startup_report["ready_seconds"] = round(time.perf_counter() - _process_started, 3)
+    # torch and transformers should only appear here once the ML model has loaded
+    startup_report["ml_modules_loaded"] = [name for name in ("torch", "transformers") if name in sys.modules]
+    logger.info(f"Startup report: {startup_report}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await retention_service.stop()
+    await delivery_service.stop()
+    await stats_service.stop()
+    await intercom_service.shutdown()
+
 @app.get("/")
 async def root():
     return {
@@ -48,6 +116,16 @@ async def root():
         "status": "operational"
     }
 
+@app.get("/startup-report", include_in_schema=False)
+async def get_startup_report():
+    return {**startup_report, "ml_inference": intercom_service.ml_inference_service.status()}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    if not metrics.enabled:
+        return PlainTextResponse("Metrics are disabled", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global exception handler caught: {exc}")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, JSON
+from sqlalchemy.orm import relationship
+from app.models.base import BaseModel
+
+class DetectionFinding(BaseModel):
+    __tablename__ = "detection_findings"
+
+    message_id = Column(Integer, ForeignKey("messages.id"), index=True)
+    finding_type = Column(String, index=True)  # e.g. 'email', 'credit_card', 'ml_sensitive'
+    original_value = Column(String, nullable=True)
+    masked_value = Column(String, nullable=True)
+    start_position = Column(Integer)
+    end_position = Column(Integer)
+    confidence_score = Column(Integer)  # Store as integer (0-100)
+    detection_method = Column(String)  # 'regex' or 'ml'
+    finding_metadata = Column(JSON)
+    
+    # Relationships
+    message = relationship("Message", back_populates="findings")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, JSON, Boolean, Integer, ForeignKey
+from sqlalchemy import Column, String, JSON, Boolean, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -15,4 +15,8 @@ class Message(BaseModel):
     
     # Relationships
     findings = relationship("DetectionFinding", back_populates="message", cascade="all, delete-orphan")
-    training_data = relationship("TrainingData", back_populates="message", uselist=False) 
\ No newline at end of file
+    training_data = relationship("TrainingData", back_populates="message", uselist=False)
+
+    __table_args__ = (
+        Index("ix_messages_created_at", "created_at"),  # retention sweeps
+    ) 
\ No newline at end of file
@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime
+from app.models.base import BaseModel
+
+class OutboxMessage(BaseModel):
+    __tablename__ = "outbox_messages"
+
+    conversation_id = Column(String, index=True)
+    body = Column(String)
+    status = Column(String, default="pending", index=True)  # 'pending', 'sending', 'sent' or 'failed'
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
\ No newline at end of file
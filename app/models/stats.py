@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, UniqueConstraint
+from app.models.base import BaseModel
+
+class DetectionStatsHourly(BaseModel):
+    __tablename__ = "detection_stats_hourly"
+
+    hour = Column(DateTime, unique=True, index=True)  # Start of the hour (UTC); STATS_TOTAL_BUCKET holds all-time totals
+    messages_processed = Column(Integer, default=0)
+    blocked_messages = Column(Integer, default=0)
+    findings_total = Column(Integer, default=0)
+    processing_time_total = Column(Float, default=0.0)  # Seconds, summed over messages
+
+class FindingStatsHourly(BaseModel):
+    __tablename__ = "finding_stats_hourly"
+
+    hour = Column(DateTime, index=True)
+    finding_type = Column(String)
+    count = Column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("hour", "finding_type", name="uq_finding_stats_hour_type"),
+    )
\ No newline at end of file
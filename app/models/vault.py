@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, Integer, ForeignKey, JSON, Boolean, Index, Uuid
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -9,7 +9,8 @@ class VaultEntry(BaseModel):
     conversation_id = Column(String, index=True)
     user_id = Column(String, index=True)
     original_message = Column(String)
-    vault_link = Column(String, unique=True)  # Generated secure link
+    secure_id = Column(Uuid, unique=True, index=True)  # Token of the vault link; the URL is built at render time
+    vault_link = Column(String, unique=True, nullable=True)  # Legacy full link, no longer written
     is_archived = Column(Boolean, default=False)
     entry_metadata = Column(JSON)  # Additional context about the redaction
     
@@ -17,6 +18,13 @@ class VaultEntry(BaseModel):
     message = relationship("Message", backref="vault_entry")
     feedback = relationship("VaultFeedback", back_populates="vault_entry", uselist=False)
 
+    # Keyset pagination indexes for listing by conversation or user, newest first
+    __table_args__ = (
+        Index("ix_vault_entries_archived_conversation_created", "is_archived", "conversation_id", "created_at", "id"),
+        Index("ix_vault_entries_archived_user_created", "is_archived", "user_id", "created_at", "id"),
+        Index("ix_vault_entries_created_at", "created_at"),  # retention sweeps
+    )
+
 class VaultFeedback(BaseModel):
     __tablename__ = "vault_feedback"
 
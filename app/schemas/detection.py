@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class DetectionBatchRequest(BaseModel):
+    texts: List[str]
+    include_masked: bool = False
+
+class DetectionBatchResponse(BaseModel):
+    total_texts: int
+    total_findings: int
+    text_index: List[int]
+    finding_type: List[str]
+    start_position: List[int]
+    end_position: List[int]
+    masked_texts: Optional[List[str]] = None
\ No newline at end of file
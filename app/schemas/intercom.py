@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class IntercomMessageItem(BaseModel):
+    # Intercom sends null for empty fields, e.g. an attachment-only message has "body": null
+    id: Optional[str] = None
+    conversation_id: Optional[str] = None
+    body: Optional[str] = None
+
+    class Config:
+        extra = "allow"
+        coerce_numbers_to_str = True
+
+class IntercomWebhookData(BaseModel):
+    item: IntercomMessageItem = Field(default_factory=IntercomMessageItem)
+
+class IntercomWebhookPayload(BaseModel):
+    topic: Optional[str] = None
+    data: IntercomWebhookData = Field(default_factory=IntercomWebhookData)
+
+    class Config:
+        extra = "allow"
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class VaultEntryBase(BaseModel):
@@ -23,6 +23,18 @@ class VaultEntryResponse(VaultEntryBase):
     class Config:
         from_attributes = True
 
+class VaultEntryPage(BaseModel):
+    entries: List[VaultEntryResponse]
+    next_cursor: Optional[str] = None
+
+class VaultEntryBulkCreate(BaseModel):
+    message_ids: List[int]
+
+class VaultEntryBulkResponse(BaseModel):
+    created: int
+    skipped: int
+    ids: List[int]
+
 class VaultFeedbackBase(BaseModel):
     comment: Optional[str] = None
     is_positive: bool = True
@@ -1,15 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
 from app.core.config import settings
+from app.core.cache import TTLCache
+import hashlib
+import hmac
 import secrets
 import logging
 
 logger = logging.getLogger(__name__)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds make needs_update flag any hash not using BCRYPT_ROUNDS
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt is CPU-bound and blocks for 100ms+; it runs here instead of on the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+_hash_semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+# Recently verified credentials, keyed by an HMAC under a per-process random key
+_credential_cache = TTLCache(settings.CREDENTIAL_CACHE_MAX_SIZE, settings.CREDENTIAL_CACHE_TTL_SECONDS)
+_credential_cache_secret = secrets.token_bytes(32)
+
+# Authenticated users keyed by a hash of their bearer token or API key. Entries
+# are dropped when the user changes through AuthService; other workers only
+# see such changes once PRINCIPAL_CACHE_TTL_SECONDS has passed.
+_principal_cache = TTLCache(settings.PRINCIPAL_CACHE_MAX_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+_principal_keys_by_user: Dict[int, Set[bytes]] = {}
+
+async def _run_hash_task(func, *args):
+    async with _hash_semaphore:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
 
 class AuthService:
     def __init__(self):
@@ -31,6 +65,29 @@ class AuthService:
             logger.error(f"Error hashing password: {e}")
             raise
 
+    async def verify_and_update_password(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password on the hashing thread pool.
+        Returns (valid, new_hash); new_hash is set when the stored hash should be
+        replaced, e.g. after BCRYPT_ROUNDS changed.
+        """
+        try:
+            return await _run_hash_task(pwd_context.verify_and_update, plain_password, hashed_password)
+        except Exception as e:
+            logger.error(f"Error verifying password: {e}")
+            return False, None
+
+    async def hash_password(self, password: str) -> str:
+        """
+        Hash a password on the hashing thread pool.
+        """
+        return await _run_hash_task(self.get_password_hash, password)
+
+    def _credential_cache_key(self, username: str, password: str, hashed_password: str) -> bytes:
+        # Includes the stored hash so a password change invalidates the entry
+        message = "\0".join((username, password, hashed_password)).encode()
+        return hmac.new(_credential_cache_secret, message, hashlib.sha256).digest()
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         try:
             to_encode = data.copy()
@@ -56,15 +113,30 @@ class AuthService:
             logger.error(f"Unexpected error verifying token: {e}")
             return None
 
-    async def authenticate_user(self, db: Session, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, db: AsyncSession, username: str, password: str) -> Optional[User]:
         try:
-            user = db.query(User).filter(User.username == username).first()
+            result = await db.execute(select(User).where(User.username == username))
+            user = result.scalars().first()
             if not user:
                 logger.warning(f"Authentication failed: User {username} not found")
                 return None
-            if not self.verify_password(password, user.hashed_password):
+
+            cache_key = self._credential_cache_key(username, password, user.hashed_password)
+            if _credential_cache.get(cache_key):
+                return user
+
+            is_valid, new_hash = await self.verify_and_update_password(password, user.hashed_password)
+            if not is_valid:
                 logger.warning(f"Authentication failed: Invalid password for user {username}")
                 return None
+
+            if new_hash:
+                # Transparent rehash, e.g. after BCRYPT_ROUNDS changed
+                user.hashed_password = new_hash
+                await db.commit()
+                cache_key = self._credential_cache_key(username, password, new_hash)
+                logger.info(f"Password hash upgraded for user {username}")
+            _credential_cache.set(cache_key, True)
             return user
         except Exception as e:
             logger.error(f"Error authenticating user: {e}")
@@ -72,7 +144,7 @@ class AuthService:
 
     async def create_user(
         self,
-        db: Session,
+        db: AsyncSession,
         username: str,
         email: str,
         password: str,
@@ -80,8 +152,8 @@ class AuthService:
         role: UserRole = UserRole.VIEWER
     ) -> User:
         try:
-            hashed_password = self.get_password_hash(password)
-            api_key = secrets.token_urlsafe(32)
+            hashed_password = await self.hash_password(password)
+            api_key = self.generate_api_key()
             
             user = User(
                 username=username,
@@ -93,16 +165,68 @@ class AuthService:
             )
             
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             logger.info(f"User {username} created successfully")
             return user
         except Exception as e:
             logger.error(f"Error creating user: {e}")
-            db.rollback()
+            await db.rollback()
             raise
 
-    async def get_current_user(self, db: Session, token: str) -> Optional[User]:
+    def generate_api_key(self) -> str:
+        return secrets.token_urlsafe(32)
+
+    def _principal_key(self, credential: str) -> bytes:
+        return hashlib.sha256(credential.encode()).digest()
+
+    def get_cached_principal(self, credential: str) -> Optional[User]:
+        """
+        Return the user cached for a bearer token or API key, if any.
+        The user is detached from any session; only column attributes are loaded.
+        """
+        return _principal_cache.get(self._principal_key(credential))
+
+    def cache_principal(self, credential: str, user: User) -> None:
+        key = self._principal_key(credential)
+        _principal_cache.set(key, user)
+        # Keep only keys that have not been evicted or expired meanwhile
+        keys = {k for k in _principal_keys_by_user.get(user.id, ()) if k in _principal_cache}
+        keys.add(key)
+        _principal_keys_by_user[user.id] = keys
+
+    def invalidate_principal(self, user_id: int) -> None:
+        """
+        Drop every cached token and API key of a user.
+        """
+        for key in _principal_keys_by_user.pop(user_id, ()):
+            _principal_cache.pop(key)
+
+    async def _update_user(self, db: AsyncSession, user_id: int, **values) -> None:
+        try:
+            await db.execute(update(User).where(User.id == user_id).values(**values))
+            await db.commit()
+            self.invalidate_principal(user_id)
+        except Exception as e:
+            logger.error(f"Error updating user {user_id}: {e}")
+            await db.rollback()
+            raise
+
+    async def reset_api_key(self, db: AsyncSession, user: User) -> str:
+        api_key = self.generate_api_key()
+        await self._update_user(db, user.id, api_key=api_key)
+        logger.info(f"API key reset for user {user.username}")
+        return api_key
+
+    async def set_user_active(self, db: AsyncSession, user: User, is_active: bool) -> None:
+        await self._update_user(db, user.id, is_active=is_active)
+        logger.info(f"User {user.username} {'activated' if is_active else 'deactivated'}")
+
+    async def set_user_role(self, db: AsyncSession, user: User, role: UserRole) -> None:
+        await self._update_user(db, user.id, role=role)
+        logger.info(f"User {user.username} role changed to {role}")
+
+    async def get_current_user(self, db: AsyncSession, token: str) -> Optional[User]:
         try:
             payload = self.verify_token(token)
             if payload is None:
@@ -110,14 +234,16 @@ class AuthService:
             username: str = payload.get("sub")
             if username is None:
                 return None
-            return db.query(User).filter(User.username == username).first()
+            result = await db.execute(select(User).where(User.username == username))
+            return result.scalars().first()
         except Exception as e:
             logger.error(f"Error getting current user: {e}")
             return None
 
-    async def get_user_by_api_key(self, db: Session, api_key: str) -> Optional[User]:
+    async def get_user_by_api_key(self, db: AsyncSession, api_key: str) -> Optional[User]:
         try:
-            return db.query(User).filter(User.api_key == api_key).first()
+            result = await db.execute(select(User).where(User.api_key == api_key))
+            return result.scalars().first()
         except Exception as e:
             logger.error(f"Error getting user by API key: {e}")
             return None
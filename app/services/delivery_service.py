@@ -0,0 +1,292 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+import httpx
+from sqlalchemy import and_, func, or_, select, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.outbox import OutboxMessage
+from app.services.intercom_service import IntercomService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token bucket limiting outbound Intercom requests.
+    Also pauses entirely when Intercom reports the rate limit window is exhausted.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: httpx.Headers) -> None:
+        """
+        Pause until the window resets once X-RateLimit-Remaining reaches zero.
+        """
+        try:
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset = headers.get("X-RateLimit-Reset")
+            if remaining is not None and reset is not None and int(remaining) <= 0:
+                self.pause(float(reset) - time.time())
+        except ValueError:
+            logger.warning(f"Unexpected rate limit headers: {remaining}, {reset}")
+
+class DeliveryService:
+    """
+    Delivers Intercom replies in the background.
+    Replies are written to the outbox_messages table first, so nothing is lost
+    on restart, then sent by a fixed number of asyncio workers under a shared
+    rate limit. Failed sends are retried with exponential backoff.
+    Every app worker process runs its own DeliveryService, so a message is
+    claimed atomically (pending -> sending) before it is sent. A claim expires
+    after INTERCOM_DELIVERY_CLAIM_TIMEOUT seconds, so a message whose worker
+    died mid-send is picked up again.
+    """
+
+    def __init__(self, intercom_service: IntercomService):
+        self.intercom_service = intercom_service
+        self.rate_limiter = TokenBucket(
+            settings.INTERCOM_RATE_LIMIT_PER_SECOND,
+            settings.INTERCOM_RATE_LIMIT_BURST
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retry_handles = set()
+
+    async def start(self) -> None:
+        """
+        Start the delivery workers and requeue messages left pending, or claimed
+        by a worker that never finished, by a previous run.
+        """
+        try:
+            self._queue = asyncio.Queue()
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(OutboxMessage.id, OutboxMessage.next_attempt_at).where(
+                        OutboxMessage.status.in_(("pending", "sending"))
+                    ).order_by(OutboxMessage.id)
+                )
+                pending = result.all()
+
+            # A claimed message's next_attempt_at is when its claim expires
+            for message_id, next_attempt_at in pending:
+                self._schedule(message_id, next_attempt_at)
+
+            self._workers = [
+                asyncio.create_task(self._worker())
+                for _ in range(settings.INTERCOM_DELIVERY_CONCURRENCY)
+            ]
+            logger.info(f"DeliveryService started with {len(self._workers)} workers, {len(pending)} pending messages")
+        except Exception as e:
+            logger.error(f"Error starting DeliveryService: {e}")
+            raise
+
+    async def stop(self) -> None:
+        """
+        Stop the workers. Unsent messages stay pending in the outbox.
+        """
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("DeliveryService stopped")
+
+    def queue_size(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def enqueue(self, conversation_id: str, body: str) -> int:
+        """
+        Store a reply in the outbox and queue it for delivery.
+        """
+        async with AsyncSessionLocal() as db:
+            try:
+                message = OutboxMessage(conversation_id=conversation_id, body=body)
+                db.add(message)
+                await db.commit()
+                message_id = message.id
+            except Exception as e:
+                logger.error(f"Error queueing message for conversation {conversation_id}: {e}")
+                await db.rollback()
+                raise
+
+        # When the workers are not running the message is picked up on the next start
+        if self._queue is not None:
+            self._queue.put_nowait(message_id)
+        logger.info(f"Queued outbox message {message_id} for conversation: {conversation_id}")
+        return message_id
+
+    def _schedule(self, message_id: int, next_attempt_at: Optional[datetime]) -> None:
+        if self._queue is None:
+            return
+        delay = (next_attempt_at - datetime.utcnow()).total_seconds() if next_attempt_at else 0
+        if delay <= 0:
+            self._queue.put_nowait(message_id)
+            return
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            if self._queue is not None:
+                self._queue.put_nowait(message_id)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            message_id = await queue.get()
+            try:
+                await self._deliver(message_id)
+            except Exception as e:
+                # Usually a database error while claiming or recording the result.
+                # Try again once any claim we hold has expired.
+                logger.error(f"Error delivering outbox message {message_id}: {e}")
+                self._schedule(
+                    message_id,
+                    datetime.utcnow() + timedelta(seconds=settings.INTERCOM_DELIVERY_CLAIM_TIMEOUT)
+                )
+            finally:
+                queue.task_done()
+
+    async def _claim(self, message_id: int) -> Optional[OutboxMessage]:
+        """
+        Atomically move a message from pending (or an expired claim) to sending
+        and count the attempt. Returns None when another worker got it first or
+        it is already finished.
+        """
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    update(OutboxMessage)
+                    .where(
+                        OutboxMessage.id == message_id,
+                        or_(
+                            OutboxMessage.status == "pending",
+                            and_(OutboxMessage.status == "sending", OutboxMessage.next_attempt_at <= now)
+                        )
+                    )
+                    .values(
+                        status="sending",
+                        attempts=func.coalesce(OutboxMessage.attempts, 0) + 1,
+                        next_attempt_at=now + timedelta(seconds=settings.INTERCOM_DELIVERY_CLAIM_TIMEOUT)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount != 1:
+                    await db.rollback()
+                    return None
+                message = await db.get(OutboxMessage, message_id)
+                await db.commit()
+                return message
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def _deliver(self, message_id: int) -> None:
+        message = await self._claim(message_id)
+        if message is None:
+            return
+
+        # No database session is held while waiting for the rate limit or Intercom
+        try:
+            await self.rate_limiter.acquire()
+            with metrics.time("send_message"):
+                response = await self.intercom_service.post_reply(message.conversation_id, message.body)
+            self.rate_limiter.update_from_headers(response.headers)
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            self.rate_limiter.update_from_headers(e.response.headers)
+            retry_after = self._retry_after(e.response) if status_code == 429 else None
+            if retry_after is not None:
+                self.rate_limiter.pause(retry_after)
+            retryable = status_code == 429 or status_code >= 500
+            metrics.inc("intercom_delivery_errors_total", status=str(status_code))
+            await self._handle_failure(message, str(e), retryable, retry_after)
+            return
+        except Exception as e:
+            await self._handle_failure(message, str(e), True)
+            return
+
+        await self._finish(message.id, status="sent", last_error=None)
+        logger.info(f"Outbox message {message_id} delivered to conversation: {message.conversation_id}")
+
+    async def _finish(self, message_id: int, **values) -> None:
+        """
+        Record the outcome of a send on a message this worker has claimed.
+        """
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id == message_id, OutboxMessage.status == "sending")
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """
+        Seconds to wait before retrying a 429, from Retry-After or X-RateLimit-Reset.
+        """
+        try:
+            if "Retry-After" in response.headers:
+                return max(0.0, float(response.headers["Retry-After"]))
+            if "X-RateLimit-Reset" in response.headers:
+                return max(0.0, float(response.headers["X-RateLimit-Reset"]) - time.time())
+        except ValueError:
+            pass
+        return None
+
+    async def _handle_failure(
+        self,
+        message: OutboxMessage,
+        error: str,
+        retryable: bool,
+        retry_after: Optional[float] = None
+    ) -> None:
+        if not retryable or message.attempts >= settings.INTERCOM_DELIVERY_MAX_ATTEMPTS:
+            await self._finish(message.id, status="failed", last_error=error[:1000])
+            logger.error(f"Outbox message {message.id} failed after {message.attempts} attempts: {error}")
+            return
+
+        if retry_after is None:
+            backoff = settings.INTERCOM_DELIVERY_BACKOFF_BASE * 2 ** (message.attempts - 1)
+            retry_after = min(settings.INTERCOM_DELIVERY_BACKOFF_MAX, backoff) * random.uniform(0.5, 1.0)
+        next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_after)
+        await self._finish(message.id, status="pending", next_attempt_at=next_attempt_at, last_error=error[:1000])
+        self._schedule(message.id, next_attempt_at)
+        logger.warning(f"Outbox message {message.id} attempt {message.attempts} failed, retrying in {retry_after:.1f}s: {error}")
\ No newline at end of file
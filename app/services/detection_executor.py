@@ -0,0 +1,122 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.detection_service import DetectionService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-process detector used by process pool workers, built once in the initializer
+_worker_detection_service: Optional[DetectionService] = None
+
+def _init_worker() -> None:
+    """
+    Build the worker's DetectionService so patterns are compiled before the first message.
+    """
+    global _worker_detection_service
+    _worker_detection_service = DetectionService()
+
+def _warm_up() -> bool:
+    return _worker_detection_service is not None
+
+def _timed_detect_and_mask(
+    detection_service: DetectionService,
+    text: str
+) -> Tuple[List[Dict[str, Any]], str, float, float]:
+    """
+    Detect and mask text, also returning how long each stage took.
+    The timings are returned rather than recorded so process pool workers can report them.
+    """
+    started = time.perf_counter()
+    findings = detection_service.detect_sensitive_data(text)
+    detected = time.perf_counter()
+    masked_text = detection_service.mask_sensitive_data(text, findings)
+    return findings, masked_text, detected - started, time.perf_counter() - detected
+
+def _detect_and_mask(text: str) -> Tuple[List[Dict[str, Any]], str, float, float, Dict[str, Dict[str, int]]]:
+    """
+    Process pool entry point. The worker's prefilter counts are returned with the
+    result so the parent's statistics cover every message.
+    """
+    findings, masked_text, detect_time, mask_time = _timed_detect_and_mask(_worker_detection_service, text)
+    return findings, masked_text, detect_time, mask_time, _worker_detection_service.drain_prefilter_stats()
+
+class DetectionExecutor:
+    """
+    Runs detection and masking off the event loop.
+    Messages shorter than DETECTION_PROCESS_THRESHOLD_CHARS go to a thread pool
+    using the shared DetectionService; longer ones go to a process pool so a large
+    pasted log cannot hold the GIL for the whole worker. Process pool workers send
+    their prefilter counts back and they are merged into the shared service.
+    """
+
+    def __init__(self, detection_service: DetectionService):
+        self.detection_service = detection_service
+        self.process_threshold = settings.DETECTION_PROCESS_THRESHOLD_CHARS
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """
+        Create the pools and pre-warm the process pool workers.
+        """
+        try:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=settings.DETECTION_THREAD_WORKERS,
+                    thread_name_prefix="detection"
+                )
+            if self._process_pool is None and settings.DETECTION_PROCESS_WORKERS > 0:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=settings.DETECTION_PROCESS_WORKERS,
+                    initializer=_init_worker
+                )
+                for _ in range(settings.DETECTION_PROCESS_WORKERS):
+                    self._process_pool.submit(_warm_up)
+            logger.info(
+                f"DetectionExecutor started with {settings.DETECTION_THREAD_WORKERS} threads "
+                f"and {settings.DETECTION_PROCESS_WORKERS} processes"
+            )
+        except Exception as e:
+            logger.error(f"Error starting DetectionExecutor: {e}")
+            raise
+
+    def shutdown(self) -> None:
+        """
+        Stop the pools without waiting for queued messages.
+        """
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        logger.info("DetectionExecutor shut down")
+
+    def _detect_and_mask(self, text: str) -> Tuple[List[Dict[str, Any]], str, float, float]:
+        return _timed_detect_and_mask(self.detection_service, text)
+
+    async def run(self, text: str) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Detect and mask sensitive data in text, returning (findings, masked_text).
+        """
+        if self._thread_pool is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        if self._process_pool is not None and len(text) >= self.process_threshold:
+            findings, masked_text, detect_time, mask_time, prefilter_counts = await loop.run_in_executor(
+                self._process_pool, _detect_and_mask, text
+            )
+            self.detection_service.merge_prefilter_stats(prefilter_counts)
+        else:
+            findings, masked_text, detect_time, mask_time = await loop.run_in_executor(
+                self._thread_pool, self._detect_and_mask, text
+            )
+
+        metrics.observe("stage_duration_seconds", detect_time, stage="detect")
+        metrics.observe("stage_duration_seconds", mask_time, stage="mask")
+        return findings, masked_text
\ No newline at end of file
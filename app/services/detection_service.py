@@ -1,8 +1,9 @@
 import re
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from app.models.detection import DetectionFinding
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -25,9 +26,285 @@ class DetectionService:
             'private_key': '[PRIVATE_KEY_REDACTED]',
             'api_key': '[API_KEY_REDACTED]'
         }
+
+        # Cheap anchors that any match of the pattern must contain. A pattern whose
+        # anchor is absent from the text cannot match and is left out of the scan.
+        # Patterns without an entry here are always scanned. Anchors start with a
+        # single character or class (\d\d{3} rather than \d{4}), which lets the
+        # regex engine jump straight to candidate positions in the anchor alternation.
+        self.prefilters = {
+            'credit_card': r'\d\d{3}',
+            'email': r'@',
+            'phone': r'\d\d{3}',
+            'ssn': r'\d\d{3}',
+            'private_key': r'-----BEGIN',
+            'api_key': r'api|token'
+        }
         
+        # Longest possible match of each pattern of bounded length, which lets
+        # _rescan_hidden search a short stretch of text instead of all of it.
+        # Patterns without an entry here are searched without a bound.
+        self.max_match_lengths = {
+            'credit_card': 19,
+            'phone': 17,
+            'ssn': 11
+        }
+
+        # Each thread counts prefilter outcomes in its own counters, without a lock.
+        # The lock only guards registering a thread's counters and draining or
+        # merging the totals.
+        self._stats_lock = threading.Lock()
+        self._local_stats = threading.local()
+        self._stats_generation = 0
+        self.compile_patterns()
         logger.info("Detection service initialized with regex patterns")
 
+    def compile_patterns(self) -> None:
+        """
+        Compile all regex patterns into a single alternation with one named group
+        per pattern type, so each text is scanned in one pass, plus each pattern
+        on its own for the fallback pass in _scan.
+        Must be called again whenever self.patterns or self.prefilters is changed.
+        """
+        self.compiled_patterns = {
+            pattern_type: re.compile(pattern)
+            for pattern_type, pattern in self.patterns.items()
+        }
+        self.compiled_prefilters = {
+            pattern_type: re.compile(anchor)
+            for pattern_type, anchor in self.prefilters.items()
+            if pattern_type in self.patterns
+        }
+        self._anchors = tuple(dict.fromkeys(
+            gate.pattern for gate in self.compiled_prefilters.values()
+        ))
+        self._compiled_anchors = {gate.pattern: gate for gate in self.compiled_prefilters.values()}
+        self._anchor_patterns = {}
+        self._combined_patterns = {}
+        self.combined_pattern = self._get_combined_pattern(tuple(self.patterns))
+        with self._stats_lock:
+            # Counters of threads that ran before this call belong to the old patterns
+            self._stats_generation += 1
+            self._thread_stats = []
+            self._stats_offset = self._empty_stats()
+
+    def _get_combined_pattern(self, pattern_types: tuple) -> re.Pattern:
+        """
+        Return the combined alternation for a subset of pattern types, compiling it
+        on first use. There are at most 2^len(patterns) subsets, in practice a handful.
+        """
+        combined = self._combined_patterns.get(pattern_types)
+        if combined is None:
+            combined = re.compile(
+                '|'.join(
+                    f'(?P<{pattern_type}>{self.patterns[pattern_type]})'
+                    for pattern_type in pattern_types
+                )
+            )
+            self._combined_patterns[pattern_types] = combined
+        return combined
+
+    def _get_anchor_pattern(self, anchors: tuple) -> re.Pattern:
+        """
+        Return the plain alternation of a subset of prefilter anchors, compiling it
+        on first use. It has no groups, which would stop the regex engine from
+        skipping ahead to positions where one of the anchors can start.
+        """
+        combined = self._anchor_patterns.get(anchors)
+        if combined is None:
+            combined = self._anchor_patterns[anchors] = re.compile('|'.join(anchors))
+        return combined
+
+    def _empty_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            pattern_type: {'checked': 0, 'skipped': 0}
+            for pattern_type in self.patterns
+        }
+
+    def _thread_counters(self) -> list:
+        """
+        Return this thread's [checked, {pattern_type: skipped}] counters,
+        registering them on the thread's first call.
+        """
+        local = self._local_stats
+        if getattr(local, 'generation', None) != self._stats_generation:
+            with self._stats_lock:
+                local.counters = [0, {pattern_type: 0 for pattern_type in self.patterns}]
+                local.generation = self._stats_generation
+                self._thread_stats.append(local.counters)
+        return local.counters
+
+    def _prefilter(self, text: str) -> tuple:
+        """
+        Return the pattern types that can possibly match text, in pattern order.
+        """
+        # Walk the text once with an alternation of the anchors not seen yet,
+        # dropping each anchor as it is found, until all are seen or the text ends
+        present = set()
+        remaining = self._anchors
+        pos = 0
+        while remaining:
+            match = self._get_anchor_pattern(remaining).search(text, pos)
+            if match is None:
+                break
+            pos = match.start()
+            found = next(
+                anchor for anchor in remaining
+                if self._compiled_anchors[anchor].match(text, pos)
+            )
+            present.add(found)
+            remaining = tuple(anchor for anchor in remaining if anchor != found)
+
+        counters = self._thread_counters()
+        counters[0] += 1
+        skipped = counters[1]
+        active = []
+        for pattern_type in self.patterns:
+            gate = self.compiled_prefilters.get(pattern_type)
+            if gate is None or gate.pattern in present:
+                active.append(pattern_type)
+            else:
+                skipped[pattern_type] += 1
+        return tuple(active)
+
+    @property
+    def prefilter_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Prefilter counts gathered since the last drain, summed over all threads.
+        """
+        with self._stats_lock:
+            return self._sum_stats()
+
+    def _sum_stats(self) -> Dict[str, Dict[str, int]]:
+        # Other threads keep counting while this runs; their counters only grow,
+        # and anything missed here shows up in the next read
+        totals = {
+            pattern_type: dict(stats)
+            for pattern_type, stats in self._stats_offset.items()
+        }
+        for checked, skipped in self._thread_stats:
+            for pattern_type, stats in totals.items():
+                stats['checked'] += checked
+                stats['skipped'] += skipped[pattern_type]
+        return totals
+
+    def drain_prefilter_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return the prefilter counts gathered since the last drain and reset them.
+        Process pool workers use this to hand their counts back to the parent.
+        The threads' own counters are never reset, the drained counts are
+        subtracted from the offset instead.
+        """
+        with self._stats_lock:
+            drained = self._sum_stats()
+            for pattern_type, stats in drained.items():
+                self._stats_offset[pattern_type]['checked'] -= stats['checked']
+                self._stats_offset[pattern_type]['skipped'] -= stats['skipped']
+        return drained
+
+    def merge_prefilter_stats(self, counts: Dict[str, Dict[str, int]]) -> None:
+        """
+        Add prefilter counts gathered by another process.
+        """
+        with self._stats_lock:
+            for pattern_type, stats in counts.items():
+                target = self._stats_offset.get(pattern_type)
+                if target is not None:
+                    target['checked'] += stats['checked']
+                    target['skipped'] += stats['skipped']
+
+    def get_prefilter_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report how often each pattern was skipped by the prefilter.
+        """
+        return {
+            pattern_type: {
+                'checked': stats['checked'],
+                'skipped': stats['skipped'],
+                'skip_rate': stats['skipped'] / stats['checked'] if stats['checked'] else 0.0
+            }
+            for pattern_type, stats in self.prefilter_stats.items()
+        }
+
+    def _scan(self, text: str) -> List[Tuple[str, re.Match]]:
+        """
+        Return (pattern_type, match) for every regex match in text, in text order.
+        The combined pass only reports the leftmost match at each position, so a
+        match of one type can hide an overlapping match of another (an SSN eating
+        the start of a phone number). A hidden match always starts inside a
+        reported match of another type, so each type is re-scanned only from
+        those matches (see _rescan_hidden) and the result contains every match
+        the patterns find individually. Texts with a single active type skip the
+        alternation altogether.
+        """
+        active_types = self._prefilter(text)
+        if not active_types:
+            return []
+        if len(active_types) == 1:
+            # Nothing of another type can hide its matches, and the alternation only adds overhead
+            pattern_type = active_types[0]
+            return [
+                (pattern_type, match)
+                for match in self.compiled_patterns[pattern_type].finditer(text)
+            ]
+        matches = [
+            (match.lastgroup, match)
+            for match in self._get_combined_pattern(active_types).finditer(text)
+        ]
+        if not matches:
+            return matches
+
+        seen = {(pattern_type, match.span()) for pattern_type, match in matches}
+        reported = len(matches)
+        for pattern_type in active_types:
+            windows = [
+                match.span()
+                for other_type, match in matches[:reported]
+                if other_type != pattern_type
+            ]
+            if windows:
+                self._rescan_hidden(text, pattern_type, windows, seen, matches)
+        if len(matches) > reported:
+            matches.sort(key=lambda item: item[1].start())
+        return matches
+
+    def _rescan_hidden(self, text: str, pattern_type: str, windows: List[Tuple[int, int]],
+                       seen: set, matches: List[Tuple[str, re.Match]]) -> None:
+        """
+        Append the matches of pattern_type that the combined pass hid behind
+        matches of other types. windows are the spans of those matches in text
+        order; only matches starting inside them can be missing. A hidden match
+        that runs past its window can throw the type's own scan out of step with
+        the combined pass, so scanning follows on until it is back in step.
+        """
+        pattern = self.compiled_patterns[pattern_type]
+        max_length = self.max_match_lengths.get(pattern_type)
+        pos = 0
+        for start, end in windows:
+            if pos < start:
+                pos = start
+            # A match starting before end never looks further than this, so the
+            # search can stop there instead of running on to the end of the text
+            limit = len(text) if max_length is None else min(len(text), end + max_length + 1)
+            while pos < end:
+                match = pattern.search(text, pos, limit)
+                if match is None or match.start() >= end:
+                    break
+                if (pattern_type, match.span()) not in seen:
+                    seen.add((pattern_type, match.span()))
+                    matches.append((pattern_type, match))
+                pos = match.end() if match.end() > match.start() else match.start() + 1
+            while pos > end:
+                match = pattern.search(text, pos)
+                if match is None:
+                    return
+                if (pattern_type, match.span()) in seen:
+                    # Back in step with the combined pass
+                    break
+                seen.add((pattern_type, match.span()))
+                matches.append((pattern_type, match))
+                pos = match.end() if match.end() > match.start() else match.start() + 1
+
     def detect_sensitive_data(self, text: str) -> List[Dict[str, Any]]:
         """
         Detect sensitive data in text using regex patterns.
@@ -35,23 +312,21 @@ class DetectionService:
         findings = []
         
         try:
-            for pattern_type, pattern in self.patterns.items():
-                matches = re.finditer(pattern, text)
-                for match in matches:
-                    finding = {
-                        'finding_type': pattern_type,
-                        'original_value': match.group(),
-                        'masked_value': self.masking_rules[pattern_type],
-                        'start_position': match.start(),
-                        'end_position': match.end(),
-                        'confidence_score': 100,  # Regex matches are always 100% confident
-                        'detection_method': 'regex',
-                        'finding_metadata': {
-                            'pattern_used': pattern,
-                            'detection_timestamp': None  # Will be set by the database
-                        }
+            for pattern_type, match in self._scan(text):
+                finding = {
+                    'finding_type': pattern_type,
+                    'original_value': match.group(),
+                    'masked_value': self.masking_rules[pattern_type],
+                    'start_position': match.start(),
+                    'end_position': match.end(),
+                    'confidence_score': 100,  # Regex matches are always 100% confident
+                    'detection_method': 'regex',
+                    'finding_metadata': {
+                        'pattern_used': self.patterns[pattern_type],
+                        'detection_timestamp': None  # Will be set by the database
                     }
-                    findings.append(finding)
+                }
+                findings.append(finding)
             
             logger.info(f"Found {len(findings)} sensitive data instances")
             return findings
@@ -59,26 +334,92 @@ class DetectionService:
             logger.error(f"Error detecting sensitive data: {e}")
             return []
 
+    def detect_many(self, texts: List[str], include_masked: bool = False) -> Dict[str, Any]:
+        """
+        Detect sensitive data in many texts at once.
+        Findings are returned column-wise, one list per field, with text_index
+        pointing back into texts. Original values are not included; they can be
+        sliced from the input with the positions.
+        """
+        text_index = []
+        finding_types = []
+        start_positions = []
+        end_positions = []
+        masked_texts = [] if include_masked else None
+
+        try:
+            for index, text in enumerate(texts):
+                spans = []
+                for pattern_type, match in self._scan(text):
+                    start, end = match.span()
+                    text_index.append(index)
+                    finding_types.append(pattern_type)
+                    start_positions.append(start)
+                    end_positions.append(end)
+                    if include_masked:
+                        spans.append((start, end, self.masking_rules[pattern_type]))
+                if include_masked:
+                    # Same overlap handling as single-message masking
+                    masked_texts.append(self._mask_spans(text, spans) if spans else text)
+
+            logger.info(f"Found {len(text_index)} sensitive data instances in {len(texts)} texts")
+        except Exception as e:
+            logger.error(f"Error detecting sensitive data in batch: {e}")
+            raise
+
+        result = {
+            'total_texts': len(texts),
+            'total_findings': len(text_index),
+            'text_index': text_index,
+            'finding_type': finding_types,
+            'start_position': start_positions,
+            'end_position': end_positions
+        }
+        if include_masked:
+            result['masked_texts'] = masked_texts
+        return result
+
     def mask_sensitive_data(self, text: str, findings: List[Dict[str, Any]]) -> str:
         """
         Mask sensitive data in text based on findings.
+        Overlapping findings are merged into one span masked by the earliest finding.
+        Findings without a masked_value (e.g. whole-message ML findings) are skipped.
         """
         try:
-            # Sort findings by start position in reverse order
-            findings.sort(key=lambda x: x['start_position'], reverse=True)
-            
-            # Create a mutable version of the text
-            masked_text = list(text)
-            
-            # Replace each finding with its mask
-            for finding in findings:
-                start = finding['start_position']
-                end = finding['end_position']
-                mask = finding['masked_value']
-                masked_text[start:end] = mask
-            
+            if not findings:
+                return text
+
+            # Build (start, end, mask) tuples so the caller's findings keep their order
+            spans = [
+                (finding['start_position'], finding['end_position'], finding['masked_value'])
+                for finding in findings
+                if finding.get('masked_value') is not None
+            ]
+            masked_text = self._mask_spans(text, spans)
+
             logger.info("Successfully masked sensitive data")
-            return ''.join(masked_text)
+            return masked_text
         except Exception as e:
             logger.error(f"Error masking sensitive data: {e}")
-            return text  # Return original text if masking fails 
\ No newline at end of file
+            return text  # Return original text if masking fails
+
+    def _mask_spans(self, text: str, spans: List[Tuple[int, int, str]]) -> str:
+        """
+        Replace each (start, end, mask) span of text with its mask. spans is sorted
+        in place; overlapping spans are merged into one masked by the earliest.
+        """
+        spans.sort(key=lambda span: (span[0], -span[1]))
+
+        # Single forward pass: copy the gap before each span, then its mask
+        parts = []
+        cursor = 0
+        for start, end, mask in spans:
+            if start < cursor:
+                # Overlaps the span already masked; just extend it
+                cursor = max(cursor, end)
+                continue
+            parts.append(text[cursor:start])
+            parts.append(mask)
+            cursor = end
+        parts.append(text[cursor:])
+        return ''.join(parts)
\ No newline at end of file
@@ -1,7 +1,11 @@
+import asyncio
 import httpx
+import time
 from typing import Dict, Optional
 from app.core.config import settings
 from app.services.detection_service import DetectionService
+from app.services.detection_executor import DetectionExecutor
+from app.services.ml_inference_service import MLInferenceService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,31 +14,106 @@ class IntercomService:
     def __init__(self):
         try:
             self.detection_service = DetectionService()
+            self.detection_executor = DetectionExecutor(self.detection_service)
+            self.ml_inference_service = MLInferenceService()
             self.headers = {
                 "Authorization": f"Bearer {settings.INTERCOM_ACCESS_TOKEN}",
                 "Content-Type": "application/json"
             }
-            self.base_url = "https://api.intercom.io"
+            self.base_url = settings.INTERCOM_API_BASE_URL
+            self.client: Optional[httpx.AsyncClient] = None
             logger.info("IntercomService initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing IntercomService: {e}")
             raise
 
+    async def startup(self) -> None:
+        """
+        Start the detection executor pools, ML inference (if enabled) and the
+        pooled Intercom HTTP client.
+        """
+        self.detection_executor.start()
+        await self.ml_inference_service.start()
+        self._get_client()
+
+    async def shutdown(self) -> None:
+        """
+        Release the detection executor pools and ML inference, and close the HTTP client.
+        """
+        self.detection_executor.shutdown()
+        await self.ml_inference_service.stop()
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            logger.info("Intercom HTTP client closed")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client, creating it on first use.
+        Connections to Intercom are kept alive and reused across requests.
+        """
+        if self.client is None:
+            http2 = settings.INTERCOM_HTTP2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("INTERCOM_HTTP2 is enabled but h2 is not installed, using HTTP/1.1")
+                    http2 = False
+
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.INTERCOM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.INTERCOM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.INTERCOM_HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(
+                    settings.INTERCOM_HTTP_TIMEOUT,
+                    connect=settings.INTERCOM_HTTP_CONNECT_TIMEOUT
+                )
+            )
+            logger.info(f"Intercom HTTP client created for {self.base_url}")
+        return self.client
+
+    def connection_pool_stats(self) -> Dict[str, int]:
+        """
+        Open and idle connections in the HTTP client's pool.
+        httpx does not expose its pool publicly, so this reads the transport's
+        httpcore pool and reports nothing if that layout changes.
+        """
+        if self.client is None:
+            return {}
+        try:
+            connections = self.client._transport._pool.connections
+            return {
+                "open": len(connections),
+                "idle": sum(1 for connection in connections if connection.is_idle())
+            }
+        except AttributeError:
+            return {}
+
     async def process_message(self, message_data: Dict) -> Dict:
         """
         Process an incoming Intercom message, detect sensitive data, and return processed version.
         """
+        started = time.perf_counter()
         try:
-            message_text = message_data.get("body", "")
+            message_text = message_data.get("body") or ""
             logger.info(f"Processing message: {message_data.get('id')}")
             
-            # Detect sensitive data
-            findings = self.detection_service.detect_sensitive_data(message_text)
+            # Detect and mask sensitive data off the event loop; the ML classifier
+            # scores the message concurrently when enabled
+            (findings, masked_text), ml_confidence = await asyncio.gather(
+                self.detection_executor.run(message_text),
+                self.ml_inference_service.classify(message_text)
+            )
+            if ml_confidence is not None and ml_confidence >= settings.MODEL_CONFIDENCE_THRESHOLD:
+                findings.append(self.ml_inference_service.build_finding(message_text, ml_confidence))
             logger.info(f"Found {len(findings)} sensitive data instances")
             
-            # Mask sensitive data
-            masked_text = self.detection_service.mask_sensitive_data(message_text, findings)
-            
             # Check if message should be blocked
             should_block = self._should_block_message(findings)
             
@@ -43,8 +122,10 @@ class IntercomService:
                 "processed_text": masked_text,
                 "findings": findings,
                 "should_block": should_block,
+                "ml_confidence": ml_confidence,
                 "message_id": message_data.get("id"),
-                "conversation_id": message_data.get("conversation_id")
+                "conversation_id": message_data.get("conversation_id"),
+                "processing_time": time.perf_counter() - started
             }
             
             logger.info(f"Message processed successfully: {message_data.get('id')}")
@@ -57,7 +138,8 @@ class IntercomService:
                 "findings": [],
                 "should_block": False,
                 "message_id": message_data.get("id"),
-                "conversation_id": message_data.get("conversation_id")
+                "conversation_id": message_data.get("conversation_id"),
+                "processing_time": time.perf_counter() - started
             }
 
     def _should_block_message(self, findings: list) -> bool:
@@ -78,23 +160,29 @@ class IntercomService:
             logger.error(f"Error determining if message should be blocked: {e}")
             return False
 
+    async def post_reply(self, conversation_id: str, message: str) -> httpx.Response:
+        """
+        Post a reply to an Intercom conversation and return the raw response,
+        so callers can read the rate limit headers.
+        """
+        response = await self._get_client().post(
+            f"/conversations/{conversation_id}/reply",
+            json={
+                "message_type": "comment",
+                "body": message
+            }
+        )
+        response.raise_for_status()
+        return response
+
     async def send_message(self, conversation_id: str, message: str) -> Dict:
         """
         Send a message to an Intercom conversation.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/conversations/{conversation_id}/reply",
-                    headers=self.headers,
-                    json={
-                        "message_type": "comment",
-                        "body": message
-                    }
-                )
-                response.raise_for_status()
-                logger.info(f"Message sent successfully to conversation: {conversation_id}")
-                return response.json()
+            response = await self.post_reply(conversation_id, message)
+            logger.info(f"Message sent successfully to conversation: {conversation_id}")
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"HTTP error sending message: {e}")
             raise
@@ -107,14 +195,12 @@ class IntercomService:
         Retrieve a conversation from Intercom.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/conversations/{conversation_id}",
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                logger.info(f"Conversation retrieved successfully: {conversation_id}")
-                return response.json()
+            response = await self._get_client().get(
+                f"/conversations/{conversation_id}"
+            )
+            response.raise_for_status()
+            logger.info(f"Conversation retrieved successfully: {conversation_id}")
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"HTTP error retrieving conversation: {e}")
             raise
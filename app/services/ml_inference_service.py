@@ -0,0 +1,189 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class MLInferenceService:
+    """
+    Classifies webhook messages with the sensitivity model in micro-batches.
+    Concurrent classify() calls are queued and collected until ML_BATCH_MAX_SIZE
+    texts are waiting or ML_BATCH_MAX_WAIT_MS has passed since the first one;
+    the batch then runs in a single forward pass on a dedicated thread, so
+    the event loop is never blocked by the model.
+    The model loads in the background after startup; until it is ready
+    classify() returns None and messages get regex detection only.
+    """
+
+    def __init__(self):
+        self.max_batch_size = max(settings.ML_BATCH_MAX_SIZE, 1)
+        self.max_wait = settings.ML_BATCH_MAX_WAIT_MS / 1000
+        self.training_service = None
+        self.load_seconds: Optional[float] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    async def start(self) -> None:
+        """
+        Start loading the model in the background and return immediately.
+        Does nothing unless ENABLE_ML_DETECTION is set.
+        """
+        if not settings.ENABLE_ML_DETECTION or self._task is not None:
+            return
+        # The model runs on one thread; torch parallelises inside each batch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-inference")
+        self._task = asyncio.create_task(self._run())
+        logger.info("ML model loading in the background, regex detection only until it is ready")
+
+    async def stop(self) -> None:
+        """
+        Stop the batching task and fail any texts still waiting.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._queue = None
+        self._shutdown_executor()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.ENABLE_ML_DETECTION,
+            "ready": self.running,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None
+        }
+
+    def _shutdown_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _load_model(self):
+        from app.services.training_service import TrainingService
+
+        training_service = TrainingService()
+        # Raises if the version was never trained; the untrained base model's
+        # scores are noise, so ML detection stays off instead
+        training_service.load_version(settings.MODEL_VERSION)
+        # One tiny batch loads the backend before real traffic arrives
+        training_service.predict_proba([""])
+        return training_service
+
+    async def classify(self, text: str) -> Optional[float]:
+        """
+        Return the probability that text is sensitive, or None if ML detection
+        is not running or the batch did not finish within ML_INFERENCE_TIMEOUT_SECONDS.
+        """
+        if not self.running:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        try:
+            return await asyncio.wait_for(future, timeout=settings.ML_INFERENCE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("ML inference timed out, using regex findings only")
+            return None
+        except Exception as e:
+            logger.error(f"Error running ML inference: {e}")
+            return None
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """
+        Wait for the first text, then gather more until the batch is full or
+        the wait budget is spent.
+        """
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """
+        Load the model off the event loop, then serve batches until stopped.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            self.training_service = await loop.run_in_executor(self._executor, self._load_model)
+        except Exception as e:
+            logger.error(f"Error loading ML model, continuing with regex detection only: {e}")
+            self._shutdown_executor()
+            return
+        self.load_seconds = time.perf_counter() - started
+        self._queue = asyncio.Queue()
+        logger.info(
+            f"ML inference ready after {self.load_seconds:.1f}s (max batch {self.max_batch_size}, "
+            f"max wait {settings.ML_BATCH_MAX_WAIT_MS}ms)"
+        )
+        await self._run_batches()
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            # Callers that already timed out are dropped from the batch
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                with metrics.time("ml_inference"):
+                    probabilities = await loop.run_in_executor(
+                        self._executor,
+                        self.training_service.predict_proba,
+                        [text for text, _ in batch]
+                    )
+                metrics.inc("ml_inference_batches_total")
+                metrics.inc("ml_inference_messages_total", len(batch))
+                for (_, future), probability in zip(batch, probabilities):
+                    if not future.done():
+                        future.set_result(probability)
+            except Exception as e:
+                logger.error(f"Error classifying batch of {len(batch)} messages: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def build_finding(self, text: str, probability: float) -> dict:
+        """
+        Build a finding in the same shape as DetectionService's regex findings.
+        The classifier scores the whole message, so the span covers all of it
+        and there is no masked_value: mask_sensitive_data skips such findings,
+        so an ML finding can block a message but never masks it.
+        """
+        return {
+            'finding_type': 'ml_sensitive',
+            'original_value': None,
+            'masked_value': None,
+            'start_position': 0,
+            'end_position': len(text),
+            'confidence_score': round(probability * 100, 2),
+            'detection_method': 'ml',
+            'finding_metadata': {
+                'model_version': self.training_service.current_version if self.training_service else None,
+                'detection_timestamp': None  # Will be set by the database
+            }
+        }
\ No newline at end of file
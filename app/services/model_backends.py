@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING, Callable, Dict, List
+from app.core.config import settings
+import logging
+import os
+
+if TYPE_CHECKING:
+    import numpy as np
+    import torch
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("pytorch", "quantized", "onnx")
+
+QUANTIZED_MODEL = "quantized/model_int8.pt"
+ONNX_MODEL = "onnx/model.onnx"
+ONNX_MODEL_INT8 = "onnx/model_int8.onnx"
+
+class TorchBackend:
+    """
+    Runs a PyTorch model (fp32 or dynamically quantized) in inference mode.
+    """
+
+    # Tensor type the tokenizer should return for this backend
+    return_tensors = "pt"
+
+    def __init__(self, model):
+        self.model = model
+        self.model.eval()
+
+    def __call__(self, inputs: Dict) -> "torch.Tensor":
+        import torch
+
+        with torch.inference_mode():
+            return self.model(**inputs).logits
+
+    def predict_proba(self, inputs: Dict) -> List[float]:
+        import torch
+
+        return torch.softmax(self(inputs), dim=-1)[:, 1].tolist()
+
+class OnnxBackend:
+    """
+    Runs an exported model with ONNX Runtime on CPU.
+    Takes and returns numpy arrays, so serving never imports torch.
+    """
+
+    return_tensors = "np"
+
+    def __init__(self, onnx_path: str):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if settings.ML_TORCH_THREADS > 0:
+            options.intra_op_num_threads = settings.ML_TORCH_THREADS
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def __call__(self, inputs: Dict) -> "np.ndarray":
+        feed = {name: inputs[name] for name in self.input_names if name in inputs}
+        return self.session.run(["logits"], feed)[0]
+
+    def predict_proba(self, inputs: Dict) -> List[float]:
+        import numpy as np
+
+        logits = self(inputs)
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return (exp[:, 1] / exp.sum(axis=-1)).tolist()
+
+def quantize_model(model):
+    """
+    Return a copy of model with its Linear layers dynamically quantized to int8.
+    """
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def export_quantized(model, model_path: str) -> str:
+    """
+    Save the whole int8 model next to its fp32 checkpoint, so the quantized
+    backend can load it without building the fp32 model first.
+    """
+    import torch
+
+    path = os.path.join(model_path, QUANTIZED_MODEL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save(quantize_model(model), path)
+    logger.info(f"Quantized model saved to {path}")
+    return path
+
+def export_onnx(model, tokenizer, model_path: str, quantize: bool = True) -> str:
+    """
+    Export the model to ONNX with dynamic batch and sequence axes and, with
+    quantize, also write an int8 copy with ONNX Runtime's dynamic quantization.
+    Returns the path of the model the onnx backend will load.
+    """
+    import torch
+
+    path = os.path.join(model_path, ONNX_MODEL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    model.eval()
+    # no_grad rather than inference_mode: tracing for export cannot use inference tensors
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    logger.info(f"ONNX model saved to {path}")
+
+    if not quantize:
+        return path
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(model_path, ONNX_MODEL_INT8)
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+    logger.info(f"Quantized ONNX model saved to {int8_path}")
+    return int8_path
+
+def load_backend(name: str, model_path: str, get_model: Callable) -> Callable:
+    """
+    Build the inference backend called in place of model(**inputs).
+    get_model returns the fp32 PyTorch model; it is only called when a backend
+    needs it, so the onnx backend and a quantized export never load it. A
+    missing export or optional dependency falls back to the fp32 model with a
+    warning.
+    """
+    if name not in BACKENDS:
+        logger.warning(f"Unknown ML_INFERENCE_BACKEND {name!r}, using pytorch")
+        name = "pytorch"
+
+    if name == "onnx":
+        for filename in (ONNX_MODEL_INT8, ONNX_MODEL):
+            onnx_path = os.path.join(model_path, filename)
+            if os.path.exists(onnx_path):
+                try:
+                    backend = OnnxBackend(onnx_path)
+                    logger.info(f"Using ONNX Runtime backend from {onnx_path}")
+                    return backend
+                except ImportError:
+                    logger.warning("ML_INFERENCE_BACKEND is onnx but onnxruntime is not installed, using pytorch")
+                    break
+        else:
+            logger.warning(f"No ONNX export in {model_path}, using pytorch")
+
+    if name == "quantized":
+        import torch
+
+        quantized_path = os.path.join(model_path, QUANTIZED_MODEL)
+        if os.path.exists(quantized_path):
+            # Only load files written by export_quantized(); this unpickles the whole model
+            quantized = torch.load(quantized_path, weights_only=False)
+            if isinstance(quantized, dict):
+                # Older exports saved only the int8 state dict
+                state_dict = quantized
+                quantized = quantize_model(get_model())
+                quantized.load_state_dict(state_dict)
+            logger.info(f"Using int8 quantized backend from {quantized_path}")
+        else:
+            logger.warning(f"No quantized export in {model_path}, quantizing the loaded model in memory")
+            quantized = quantize_model(get_model())
+        return TorchBackend(quantized)
+
+    return TorchBackend(get_model())
\ No newline at end of file
@@ -0,0 +1,87 @@
+from typing import Dict, List
+import logging
+import math
+import os
+import pickle
+
+logger = logging.getLogger(__name__)
+
+# Architectures TrainingService can train and serve, selected by ML_MODEL_ARCHITECTURE.
+# Transformers are loaded with AutoModelForSequenceClassification; tfidf is a
+# scikit-learn TF-IDF + linear model that needs neither torch nor transformers.
+MODEL_REGISTRY: Dict[str, Dict[str, str]] = {
+    "bert-base": {"type": "transformer", "pretrained": "bert-base-uncased"},
+    "distilbert": {"type": "transformer", "pretrained": "distilbert-base-uncased"},
+    "minilm": {"type": "transformer", "pretrained": "nreimers/MiniLM-L6-H384-uncased"},
+    "tfidf": {"type": "tfidf"}
+}
+
+def get_model_spec(architecture: str) -> Dict[str, str]:
+    """
+    Look up an architecture in the registry.
+    """
+    try:
+        return MODEL_REGISTRY[architecture]
+    except KeyError:
+        raise ValueError(
+            f"Unknown model architecture {architecture!r}, expected one of {', '.join(MODEL_REGISTRY)}"
+        )
+
+class TfidfClassifier:
+    """
+    Character n-gram TF-IDF features with a linear model.
+    Trained either on hard labels (logistic regression) or, for distillation,
+    by regressing the teacher's log-odds (ridge), whose sigmoid gives the
+    sensitive-class probability.
+    """
+
+    FILENAME = "tfidf.pkl"
+
+    def __init__(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.vectorizer = TfidfVectorizer(
+            analyzer="char_wb",
+            ngram_range=(3, 5),
+            sublinear_tf=True,
+            max_features=200000
+        )
+        self.model = None
+        self.distilled = False
+
+    def fit(self, texts: List[str], labels: List[int]) -> None:
+        from sklearn.linear_model import LogisticRegression
+
+        features = self.vectorizer.fit_transform(texts)
+        self.model = LogisticRegression(max_iter=1000, class_weight="balanced")
+        self.model.fit(features, labels)
+        self.distilled = False
+
+    def fit_distilled(self, texts: List[str], teacher_log_odds: List[float]) -> None:
+        from sklearn.linear_model import Ridge
+
+        features = self.vectorizer.fit_transform(texts)
+        self.model = Ridge(alpha=1.0)
+        self.model.fit(features, teacher_log_odds)
+        self.distilled = True
+
+    def predict_proba(self, texts: List[str]) -> List[float]:
+        features = self.vectorizer.transform(texts)
+        if self.distilled:
+            return [1 / (1 + math.exp(-score)) for score in self.model.predict(features)]
+        return self.model.predict_proba(features)[:, 1].tolist()
+
+    def save(self, model_path: str) -> None:
+        os.makedirs(model_path, exist_ok=True)
+        with open(os.path.join(model_path, self.FILENAME), "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def exists(cls, model_path: str) -> bool:
+        return os.path.exists(os.path.join(model_path, cls.FILENAME))
+
+    @classmethod
+    def load(cls, model_path: str) -> "TfidfClassifier":
+        # Only load files written by save(); pickle is not safe for untrusted input
+        with open(os.path.join(model_path, cls.FILENAME), "rb") as f:
+            return pickle.load(f)
\ No newline at end of file
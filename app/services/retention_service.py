@@ -0,0 +1,129 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, delete, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.detection import DetectionFinding
+from app.models.message import Message
+from app.models.training import TrainingData
+from app.models.vault import VaultEntry, VaultFeedback
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RetentionService:
+    """
+    Enforces VAULT_RETENTION_DAYS on vault entries and messages.
+    Work is done in small chunks of VAULT_RETENTION_CHUNK_SIZE rows, each in its
+    own short transaction, with a pause between chunks so the sweep never holds
+    long locks or starves request traffic.
+    """
+
+    def __init__(self):
+        self.retention_days = settings.VAULT_RETENTION_DAYS
+        self.mode = settings.VAULT_RETENTION_MODE
+        self.chunk_size = settings.VAULT_RETENTION_CHUNK_SIZE
+        self.chunk_delay = settings.VAULT_RETENTION_CHUNK_DELAY_SECONDS
+        self.interval = settings.VAULT_RETENTION_INTERVAL_SECONDS
+        self.last_report: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _chunks(self, id_query, id_column, process) -> int:
+        """
+        Repeatedly select up to chunk_size ids and hand them to process until none are left.
+        id_query must be ordered by id_column. Each chunk starts after the last id of
+        the previous one, so rows that were already handled are not scanned again.
+        """
+        total = 0
+        last_id = None
+        while True:
+            query = id_query if last_id is None else id_query.where(id_column > last_id)
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(query.limit(self.chunk_size))
+                ids = result.scalars().all()
+                if not ids:
+                    return total
+                await process(db, ids)
+                await db.commit()
+            total += len(ids)
+            last_id = ids[-1]
+            await asyncio.sleep(self.chunk_delay)
+
+    async def _purge_vault_entries(self, db: AsyncSession, ids: List[int]) -> None:
+        await db.execute(delete(VaultFeedback).where(VaultFeedback.vault_entry_id.in_(ids)))
+        await db.execute(delete(VaultEntry).where(VaultEntry.id.in_(ids)))
+
+    async def _archive_vault_entries(self, db: AsyncSession, ids: List[int]) -> None:
+        await db.execute(update(VaultEntry).where(VaultEntry.id.in_(ids)).values(is_archived=True))
+
+    async def _purge_messages(self, db: AsyncSession, ids: List[int]) -> None:
+        # Bulk deletes skip the ORM cascade, so findings are removed explicitly
+        await db.execute(delete(DetectionFinding).where(DetectionFinding.message_id.in_(ids)))
+        await db.execute(delete(Message).where(Message.id.in_(ids)))
+
+    async def run_once(self) -> Dict:
+        """
+        Run one retention sweep and return a report of rows processed and run time.
+        """
+        started = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        report = {
+            "mode": self.mode,
+            "cutoff": cutoff.isoformat(),
+            "vault_entries": 0,
+            "messages": 0
+        }
+
+        try:
+            if self.mode == "archive":
+                entry_ids = select(VaultEntry.id).where(
+                    VaultEntry.created_at < cutoff,
+                    VaultEntry.is_archived == False
+                ).order_by(VaultEntry.id)
+                report["vault_entries"] = await self._chunks(entry_ids, VaultEntry.id, self._archive_vault_entries)
+            else:
+                entry_ids = select(VaultEntry.id).where(
+                    VaultEntry.created_at < cutoff
+                ).order_by(VaultEntry.id)
+                report["vault_entries"] = await self._chunks(entry_ids, VaultEntry.id, self._purge_vault_entries)
+
+                # Messages still referenced by a vault entry or kept as training data stay.
+                # Correlated NOT EXISTS probes the message_id index per candidate row
+                # instead of materializing both id lists for every chunk.
+                message_ids = select(Message.id).where(
+                    Message.created_at < cutoff,
+                    ~exists().where(VaultEntry.message_id == Message.id),
+                    ~exists().where(TrainingData.message_id == Message.id)
+                ).order_by(Message.id)
+                report["messages"] = await self._chunks(message_ids, Message.id, self._purge_messages)
+        except Exception as e:
+            logger.error(f"Error running retention sweep: {e}")
+            report["error"] = str(e)
+
+        report["duration_seconds"] = round(time.monotonic() - started, 3)
+        self.last_report = report
+        logger.info(f"Retention sweep completed: {report}")
+        return report
+
+    async def _run_forever(self) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Run the sweep every VAULT_RETENTION_INTERVAL_SECONDS in the background.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info(f"Retention sweeper started, keeping {self.retention_days} days in {self.mode} mode")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("Retention sweeper stopped")
\ No newline at end of file
@@ -0,0 +1,165 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.stats import DetectionStatsHourly, FindingStatsHourly
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bucket holding the all-time totals, so the dashboard reads one row per
+# counter no matter how much history there is
+STATS_TOTAL_BUCKET = datetime(1970, 1, 1)
+
+_COUNTERS = ("messages_processed", "blocked_messages", "findings_total", "processing_time_total")
+
+class StatsService:
+    """
+    Maintains per-hour detection rollups.
+    Processed messages are counted in memory and added to the hourly and
+    all-time rows every STATS_FLUSH_INTERVAL_SECONDS with upserts, so the
+    webhook path does no extra database writes and reads never scan messages.
+    """
+
+    def __init__(self):
+        self.flush_interval = settings.STATS_FLUSH_INTERVAL_SECONDS
+        self._pending: Dict[datetime, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _new_bucket(self) -> Dict[str, Any]:
+        return {
+            "messages_processed": 0,
+            "blocked_messages": 0,
+            "findings_total": 0,
+            "processing_time_total": 0.0,
+            "finding_types": Counter()
+        }
+
+    def record_message(self, findings: List[Dict[str, Any]], blocked: bool, processing_time: float) -> None:
+        """
+        Count one processed message towards the current hour.
+        """
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        bucket = self._pending.get(hour)
+        if bucket is None:
+            bucket = self._pending[hour] = self._new_bucket()
+        bucket["messages_processed"] += 1
+        bucket["blocked_messages"] += 1 if blocked else 0
+        bucket["findings_total"] += len(findings)
+        bucket["processing_time_total"] += processing_time
+        for finding in findings:
+            bucket["finding_types"][finding["finding_type"]] += 1
+
+    def _insert(self):
+        if async_engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert
+
+    async def _add_bucket(self, db: AsyncSession, hour: datetime, bucket: Dict[str, Any]) -> None:
+        insert = self._insert()
+        statement = insert(DetectionStatsHourly).values(hour=hour, **{name: bucket[name] for name in _COUNTERS})
+        statement = statement.on_conflict_do_update(
+            index_elements=["hour"],
+            set_={name: getattr(DetectionStatsHourly, name) + statement.excluded[name] for name in _COUNTERS}
+        )
+        await db.execute(statement)
+
+        for finding_type, count in bucket["finding_types"].items():
+            statement = insert(FindingStatsHourly).values(hour=hour, finding_type=finding_type, count=count)
+            statement = statement.on_conflict_do_update(
+                index_elements=["hour", "finding_type"],
+                set_={"count": FindingStatsHourly.count + statement.excluded.count}
+            )
+            await db.execute(statement)
+
+    async def flush(self) -> None:
+        """
+        Add the counts gathered since the last flush to the rollup tables.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        total = self._new_bucket()
+        for bucket in pending.values():
+            for name in _COUNTERS:
+                total[name] += bucket[name]
+            total["finding_types"].update(bucket["finding_types"])
+
+        try:
+            async with AsyncSessionLocal() as db:
+                for hour, bucket in pending.items():
+                    await self._add_bucket(db, hour, bucket)
+                await self._add_bucket(db, STATS_TOTAL_BUCKET, total)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error flushing detection stats: {e}")
+            # Keep the counts for the next flush
+            for hour, bucket in pending.items():
+                current = self._pending.setdefault(hour, self._new_bucket())
+                for name in _COUNTERS:
+                    current[name] += bucket[name]
+                current["finding_types"].update(bucket["finding_types"])
+
+    async def get_stats(self, db: AsyncSession, hours: int = 24) -> Dict[str, Any]:
+        """
+        Read all-time totals and the last `hours` hourly rollups.
+        """
+        since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+
+        result = await db.execute(
+            select(DetectionStatsHourly).where(
+                (DetectionStatsHourly.hour == STATS_TOTAL_BUCKET) | (DetectionStatsHourly.hour >= since)
+            ).order_by(DetectionStatsHourly.hour)
+        )
+        rows = result.scalars().all()
+        result = await db.execute(
+            select(FindingStatsHourly.finding_type, FindingStatsHourly.count).where(
+                FindingStatsHourly.hour == STATS_TOTAL_BUCKET
+            )
+        )
+        detection_types = {finding_type: count for finding_type, count in result.all()}
+
+        total = next((row for row in rows if row.hour == STATS_TOTAL_BUCKET), None)
+        messages_processed = total.messages_processed if total else 0
+        return {
+            "total_messages_processed": messages_processed,
+            "total_sensitive_data_found": total.findings_total if total else 0,
+            "blocked_messages": total.blocked_messages if total else 0,
+            "detection_types": detection_types,
+            "avg_processing_time": total.processing_time_total / messages_processed if messages_processed else 0.0,
+            "hourly": [
+                {
+                    "hour": row.hour.isoformat(),
+                    "messages_processed": row.messages_processed,
+                    "blocked_messages": row.blocked_messages,
+                    "findings_total": row.findings_total
+                }
+                for row in rows if row.hour != STATS_TOTAL_BUCKET
+            ]
+        }
+
+    async def _run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        """
+        Stop the flush loop and write out what is still pending.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
\ No newline at end of file
@@ -1,48 +1,157 @@
-from typing import List, Dict, Optional
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer
+from typing import TYPE_CHECKING, List, Dict, Iterator, Optional, Sequence
 from app.models.training import TrainingData
 from app.models.message import Message
 from app.core.config import settings
+from app.services.model_backends import load_backend
+from app.services.model_registry import TfidfClassifier, get_model_spec
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import numpy as np
 from datetime import datetime
 import logging
 import os
+import random
+import threading
+import time
+
+if TYPE_CHECKING:
+    import torch
 
 logger = logging.getLogger(__name__)
 
+# TrainingData.label values counted as the sensitive class
+SENSITIVE_LABELS = {"sensitive", "1", "true"}
+
+_torch_lock = threading.Lock()
+_torch_configured = False
+
+def _import_torch():
+    """
+    Import torch on first use and apply ML_TORCH_THREADS once.
+    torch and transformers are never imported at module load, so processes
+    that only run regex detection do not pay for them.
+    """
+    global _torch_configured
+    import torch
+
+    with _torch_lock:
+        if not _torch_configured:
+            if settings.ML_TORCH_THREADS > 0:
+                torch.set_num_threads(settings.ML_TORCH_THREADS)
+            _torch_configured = True
+    return torch
+
 class TrainingService:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, architecture: Optional[str] = None):
         try:
-            self.model_name = "bert-base-uncased"
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                self.model_name,
-                num_labels=2  # binary classification: sensitive or not
-            )
+            self.architecture = architecture or settings.ML_MODEL_ARCHITECTURE
+            spec = get_model_spec(self.architecture)
+            self.model_type = spec["type"]
+            self.model_name = spec.get("pretrained")
             self.current_version = settings.MODEL_VERSION
+            self.backend_name = backend or settings.ML_INFERENCE_BACKEND
+            # Loaded on first access to self.model or self.tokenizer, from the
+            # saved version in _model_path once load_version() has set it
+            self._model = None
+            self._tokenizer = None
+            self._model_path: Optional[str] = None
+            self._backend = None
+            self._tfidf: Optional[TfidfClassifier] = None
+            self._load_lock = threading.RLock()
             logger.info(f"TrainingService initialized with model version: {self.current_version}")
         except Exception as e:
             logger.error(f"Error initializing TrainingService: {e}")
             raise
 
+    @property
+    def model(self):
+        if self._model is None:
+            self._load_base_model()
+        return self._model
+
+    @model.setter
+    def model(self, model) -> None:
+        self._model = model
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._load_tokenizer()
+        return self._tokenizer
+
+    @tokenizer.setter
+    def tokenizer(self, tokenizer) -> None:
+        self._tokenizer = tokenizer
+
+    def get_backend(self):
+        """
+        Return the inference backend for the current version, loading it once.
+        """
+        with self._load_lock:
+            if self._backend is None:
+                if self.backend_name != "onnx":
+                    _import_torch()
+                self._backend = load_backend(
+                    self.backend_name,
+                    f"./models/version_{self.current_version}",
+                    lambda: self.model
+                )
+            return self._backend
+
+    def _load_tokenizer(self) -> None:
+        """
+        Load the tokenizer of the loaded version, or of the pretrained base model, once.
+        Needs transformers but not torch.
+        """
+        with self._load_lock:
+            if self._tokenizer is not None:
+                return
+            if self.model_type != "transformer":
+                raise ValueError(f"The {self.architecture} architecture has no tokenizer to load")
+            from transformers import AutoTokenizer
+
+            self._tokenizer = AutoTokenizer.from_pretrained(self._model_path or self.model_name)
+
+    def _load_base_model(self) -> None:
+        """
+        Load the fp32 model of the loaded version, or the pretrained base model, once.
+        """
+        with self._load_lock:
+            if self._model is not None:
+                return
+            if self.model_type != "transformer":
+                raise ValueError(f"The {self.architecture} architecture has no pretrained model to load")
+            _import_torch()
+            from transformers import AutoModelForSequenceClassification
+
+            started = time.perf_counter()
+            if self._model_path:
+                self._model = AutoModelForSequenceClassification.from_pretrained(self._model_path)
+            else:
+                self._model = AutoModelForSequenceClassification.from_pretrained(
+                    self.model_name,
+                    num_labels=2  # binary classification: sensitive or not
+                )
+            logger.info(f"Loaded {self._model_path or self.model_name} in {time.perf_counter() - started:.1f}s")
+
     async def prepare_training_data(self, db: Session) -> List[Dict]:
         """
-        Prepare training data from approved examples in the database.
+        Prepare training data from validated examples in the database.
+        A label in SENSITIVE_LABELS (case-insensitive) is the positive class.
         """
         try:
-            training_data = db.query(TrainingData).filter(
-                TrainingData.training_status == "approved",
-                TrainingData.manual_review == True
+            rows = db.execute(
+                select(Message.original_text, TrainingData.label)
+                .join(TrainingData.message)
+                .where(TrainingData.is_validated == True)
+                .order_by(TrainingData.id)
             ).all()
 
             data = [
                 {
-                    "text": data.message.original_text,
-                    "label": 1 if data.is_sensitive else 0
+                    "text": row.original_text,
+                    "label": 1 if (row.label or "").strip().lower() in SENSITIVE_LABELS else 0
                 }
-                for data in training_data
+                for row in rows
             ]
             
             logger.info(f"Prepared {len(data)} training examples")
@@ -60,11 +169,20 @@ class TrainingService:
                 logger.warning("No training data provided")
                 return
 
+            if self.model_type == "tfidf":
+                self._tfidf = TfidfClassifier()
+                self._tfidf.fit([item["text"] for item in training_data], [item["label"] for item in training_data])
+                self._save(f"./models/version_{self.current_version}")
+                logger.info(f"TF-IDF model trained on {len(training_data)} examples")
+                return
+
             # Create output directories if they don't exist
             os.makedirs("./results", exist_ok=True)
             os.makedirs("./logs", exist_ok=True)
             os.makedirs("./models", exist_ok=True)
 
+            from transformers import TrainingArguments, Trainer
+
             # Prepare training arguments
             training_args = TrainingArguments(
                 output_dir="./results",
@@ -86,6 +204,7 @@ class TrainingService:
             # Train the model
             logger.info("Starting model training")
             trainer.train()
+            self._backend = None
             logger.info("Model training completed")
 
             # Save the model
@@ -97,41 +216,160 @@ class TrainingService:
             logger.error(f"Error training model: {e}")
             raise
 
-    async def evaluate_model(self, db: Session) -> Dict:
+    async def distill_model(self, training_data: List[Dict], teacher: "TrainingService") -> None:
+        """
+        Train this (smaller) model to match the teacher's logits.
+        Transformer students minimise a blend of KL divergence to the teacher's
+        temperature-softened distribution and cross-entropy on the labels,
+        weighted by ML_DISTILL_ALPHA. TF-IDF students regress the teacher's
+        log-odds directly.
+        """
+        try:
+            if not training_data:
+                logger.warning("No training data provided")
+                return
+
+            torch = _import_torch()
+            import torch.nn.functional as F
+
+            texts = [item["text"] or "" for item in training_data]
+            labels = torch.tensor([item["label"] for item in training_data])
+            batch_size = settings.ML_DISTILL_BATCH_SIZE
+            teacher_logits = torch.cat([
+                torch.as_tensor(teacher.predict_logits(texts[start:start + batch_size]))
+                for start in range(0, len(texts), batch_size)
+            ]).float()
+            logger.info(f"Computed teacher logits for {len(texts)} examples")
+
+            if self.model_type == "tfidf":
+                log_odds = (teacher_logits[:, 1] - teacher_logits[:, 0]).clamp(-10, 10).tolist()
+                self._tfidf = TfidfClassifier()
+                self._tfidf.fit_distilled(texts, log_odds)
+            else:
+                temperature = settings.ML_DISTILL_TEMPERATURE
+                alpha = settings.ML_DISTILL_ALPHA
+                model = self.model
+                optimizer = torch.optim.AdamW(model.parameters(), lr=settings.ML_DISTILL_LEARNING_RATE)
+                order = list(range(len(texts)))
+
+                model.train()
+                for epoch in range(settings.ML_DISTILL_EPOCHS):
+                    random.shuffle(order)
+                    total_loss = 0.0
+                    for start in range(0, len(order), batch_size):
+                        indices = order[start:start + batch_size]
+                        inputs = self.tokenizer(
+                            [texts[i] for i in indices],
+                            return_tensors="pt",
+                            padding="longest",
+                            truncation=True,
+                            max_length=settings.ML_MAX_SEQUENCE_LENGTH
+                        )
+                        student_logits = model(**inputs).logits
+                        soft_loss = F.kl_div(
+                            F.log_softmax(student_logits / temperature, dim=-1),
+                            F.softmax(teacher_logits[indices] / temperature, dim=-1),
+                            reduction="batchmean"
+                        ) * temperature ** 2
+                        hard_loss = F.cross_entropy(student_logits, labels[indices])
+                        loss = alpha * soft_loss + (1 - alpha) * hard_loss
+
+                        optimizer.zero_grad()
+                        loss.backward()
+                        optimizer.step()
+                        total_loss += loss.item() * len(indices)
+                    logger.info(
+                        f"Distillation epoch {epoch + 1}/{settings.ML_DISTILL_EPOCHS}: "
+                        f"loss {total_loss / len(texts):.4f}"
+                    )
+                model.eval()
+                self._backend = None
+
+            model_path = f"./models/version_{self.current_version}"
+            self._save(model_path)
+            logger.info(f"Distilled {self.architecture} model saved to {model_path}")
+        except Exception as e:
+            logger.error(f"Error distilling model: {e}")
+            raise
+
+    def _save(self, model_path: str) -> None:
+        if self.model_type == "tfidf":
+            self._tfidf.save(model_path)
+            return
+        self.model.save_pretrained(model_path)
+        self.tokenizer.save_pretrained(model_path)
+
+    def _tokenize(self, texts: List[str], return_tensors: str) -> Dict:
+        """
+        Tokenize a batch, padded only to the longest text in it.
+        """
+        return self.tokenizer(
+            texts,
+            return_tensors=return_tensors,
+            padding="longest",
+            truncation=True,
+            max_length=settings.ML_MAX_SEQUENCE_LENGTH
+        )
+
+    def predict_logits(self, texts: List[str]) -> "torch.Tensor":
+        """
+        Classify a batch of texts in one forward pass, without building an
+        autograd graph. The onnx backend returns a numpy array instead.
+        """
+        backend = self.get_backend()
+        return backend(self._tokenize(texts, backend.return_tensors))
+
+    def predict_proba(self, texts: List[str]) -> List[float]:
+        """
+        Probability of the sensitive class for each text.
+        """
+        if self.model_type == "tfidf":
+            if self._tfidf is None:
+                raise ValueError("No trained tfidf model loaded")
+            return self._tfidf.predict_proba(texts)
+        backend = self.get_backend()
+        return backend.predict_proba(self._tokenize(texts, backend.return_tensors))
+
+    def _length_buckets(self, rows: Sequence, batch_size: int) -> Iterator[Sequence]:
+        """
+        Sort rows by text length and cut them into batches, so texts of similar
+        length are padded together.
+        """
+        rows = sorted(rows, key=lambda row: len(row.original_text or ""))
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    async def evaluate_model(self, db: Session, batch_size: Optional[int] = None) -> Dict:
         """
         Evaluate the model's performance on a test set.
+        Rows are streamed from the database in windows of ML_EVAL_BUCKET_BATCHES
+        batches; each window is length-bucketed and run in batches.
         """
         try:
+            batch_size = batch_size or settings.ML_EVAL_BATCH_SIZE
+            window_size = batch_size * settings.ML_EVAL_BUCKET_BATCHES
+
             # Get test data (messages not used in training)
-            test_data = db.query(Message).filter(
-                ~Message.id.in_(
-                    db.query(TrainingData.message_id)
-                )
-            ).all()
+            query = select(Message.original_text, Message.is_blocked).where(
+                ~Message.id.in_(select(TrainingData.message_id).where(TrainingData.message_id.is_not(None)))
+            ).execution_options(yield_per=window_size)
 
-            predictions = []
-            actual_labels = []
+            correct = 0
+            total_samples = 0
 
-            for message in test_data:
-                # Get prediction
-                inputs = self.tokenizer(
-                    message.original_text,
-                    return_tensors="pt",
-                    truncation=True,
-                    max_length=512
-                )
-                outputs = self.model(**inputs)
-                prediction = torch.argmax(outputs.logits).item()
-                
-                predictions.append(prediction)
-                actual_labels.append(1 if message.is_blocked else 0)
+            for window in db.execute(query).partitions():
+                for batch in self._length_buckets(window, batch_size):
+                    probabilities = self.predict_proba([row.original_text or "" for row in batch])
+                    for probability, row in zip(probabilities, batch):
+                        correct += (probability >= 0.5) == bool(row.is_blocked)
+                total_samples += len(window)
 
             # Calculate metrics
-            accuracy = np.mean(np.array(predictions) == np.array(actual_labels))
+            accuracy = correct / total_samples if total_samples else 0.0
             
             result = {
                 "accuracy": accuracy,
-                "total_samples": len(test_data),
+                "total_samples": total_samples,
                 "timestamp": datetime.utcnow().isoformat(),
                 "model_version": self.current_version
             }
@@ -154,27 +392,45 @@ class TrainingService:
         """
         try:
             self.current_version = new_version
-            model_path = f"./models/version_{self.current_version}"
-            self.model.save_pretrained(model_path)
-            self.tokenizer.save_pretrained(model_path)
+            self._save(f"./models/version_{self.current_version}")
             logger.info(f"Model version updated to {new_version}")
         except Exception as e:
             logger.error(f"Error updating model version: {e}")
             raise
 
+    def load_version(self, version: str) -> None:
+        """
+        Load a saved model version synchronously, e.g. from a worker thread.
+        """
+        model_path = f"./models/version_{version}"
+        if not os.path.exists(model_path):
+            raise ValueError(f"Model version {version} not found")
+            
+        self.current_version = version
+        if TfidfClassifier.exists(model_path):
+            self.architecture = "tfidf"
+            self.model_type = "tfidf"
+            self._tfidf = TfidfClassifier.load(model_path)
+            logger.info(f"Model version {version} loaded successfully")
+            return
+
+        # The fp32 weights load on first use of self.model, so the onnx backend
+        # and a quantized export never need them
+        with self._load_lock:
+            self.model_type = "transformer"
+            self._model_path = model_path
+            self._model = None
+            self._tokenizer = None
+            self._backend = None
+        self._load_tokenizer()
+        logger.info(f"Model version {version} loaded successfully")
+
     async def load_model_version(self, version: str) -> None:
         """
         Load a specific version of the model.
         """
         try:
-            model_path = f"./models/version_{version}"
-            if not os.path.exists(model_path):
-                raise ValueError(f"Model version {version} not found")
-                
-            self.current_version = version
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
-            self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-            logger.info(f"Model version {version} loaded successfully")
+            self.load_version(version)
         except Exception as e:
             logger.error(f"Error loading model version: {e}")
             raise 
\ No newline at end of file
@@ -1,9 +1,14 @@
-from typing import Optional, List, Dict
-from sqlalchemy.orm import Session
+from typing import Optional, List, Dict, Tuple, AsyncIterator
+from sqlalchemy import select, insert, exists, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.vault import VaultEntry, VaultFeedback
 from app.models.message import Message
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 import uuid
+import base64
+import csv
+import io
 from datetime import datetime
 import json
 import logging
@@ -19,87 +24,254 @@ class VaultService:
             logger.error(f"Error initializing VaultService: {e}")
             raise
 
-    async def create_vault_entry(self, db: Session, message: Message) -> VaultEntry:
+    def build_vault_link(self, secure_id: Optional[uuid.UUID]) -> Optional[str]:
+        """
+        Compose the public vault link for a secure ID.
+        Links are built at render time, so VAULT_BASE_URL can change freely.
+        """
+        if secure_id is None:
+            return None
+        return f"{self.vault_base_url}/view/{secure_id}"
+
+    def parse_secure_id(self, token_or_link: str) -> uuid.UUID:
+        """
+        Extract the secure ID from a bare token or a full vault link.
+        Raises ValueError if it is not a valid UUID.
+        """
+        return uuid.UUID(token_or_link.rstrip("/").rsplit("/", 1)[-1])
+
+    def _build_vault_entry_values(self, message: Message) -> Dict:
+        """
+        Column values for the vault entry of a redacted message, with a new secure ID.
+        """
+        return {
+            "message_id": message.id,
+            "conversation_id": message.conversation_id,
+            "user_id": message.intercom_message_id.split("_")[0],  # Extract user ID from message ID
+            "original_message": message.original_text,
+            "secure_id": uuid.uuid4(),
+            "entry_metadata": {
+                "redaction_timestamp": datetime.utcnow().isoformat(),
+                "detection_method": message.detection_method,
+                "confidence_score": message.confidence_score
+            }
+        }
+
+    async def create_vault_entry(self, db: AsyncSession, message: Message) -> VaultEntry:
         """
         Create a new vault entry for a redacted message.
         """
         try:
-            # Generate a secure unique link
-            secure_id = str(uuid.uuid4())
-            vault_link = f"{self.vault_base_url}/view/{secure_id}"
-
-            vault_entry = VaultEntry(
-                message_id=message.id,
-                conversation_id=message.conversation_id,
-                user_id=message.intercom_message_id.split("_")[0],  # Extract user ID from message ID
-                original_message=message.original_text,
-                vault_link=vault_link,
-                metadata={
-                    "redaction_timestamp": datetime.utcnow().isoformat(),
-                    "detection_method": message.detection_method,
-                    "confidence_score": message.confidence_score
-                }
-            )
+            vault_entry = VaultEntry(**self._build_vault_entry_values(message))
 
             db.add(vault_entry)
-            db.commit()
-            db.refresh(vault_entry)
+            await db.commit()
+            await db.refresh(vault_entry)
             logger.info(f"Vault entry created successfully: {vault_entry.id}")
             return vault_entry
         except Exception as e:
             logger.error(f"Error creating vault entry: {e}")
-            db.rollback()
+            await db.rollback()
             raise
 
-    async def get_vault_entry(self, db: Session, vault_link: str) -> Optional[VaultEntry]:
+    async def create_vault_entries_bulk(
+        self,
+        db: AsyncSession,
+        messages: List[Message],
+        batch_size: Optional[int] = None
+    ) -> List[int]:
         """
-        Retrieve a vault entry by its secure link.
+        Create vault entries for many redacted messages.
+        Rows are inserted with one multi-row INSERT ... RETURNING id per batch,
+        all in a single transaction, so a failure part way through leaves no
+        entries behind; no objects are refreshed.
+        Returns the new entry IDs in the order of messages.
         """
+        batch_size = batch_size or settings.VAULT_BULK_INSERT_BATCH_SIZE
+        statement = insert(VaultEntry).returning(VaultEntry.id, sort_by_parameter_order=True)
+        entry_ids = []
+
         try:
-            entry = db.query(VaultEntry).filter(
-                VaultEntry.vault_link == vault_link,
-                VaultEntry.is_archived == False
-            ).first()
+            for start in range(0, len(messages), batch_size):
+                rows = [self._build_vault_entry_values(message) for message in messages[start:start + batch_size]]
+                result = await db.execute(statement, rows)
+                entry_ids.extend(result.scalars().all())
+            await db.commit()
+
+            logger.info(f"Created {len(entry_ids)} vault entries in bulk")
+            return entry_ids
+        except Exception as e:
+            logger.error(f"Error creating vault entries in bulk, rolled back {len(entry_ids)} rows: {e}")
+            await db.rollback()
+            raise
+
+    async def get_messages_without_vault_entry(self, db: AsyncSession, message_ids: List[int]) -> List[Message]:
+        """
+        Load the given messages, skipping those that already have a vault entry.
+        """
+        result = await db.execute(
+            select(Message).where(
+                Message.id.in_(message_ids),
+                # NOT EXISTS rather than NOT IN: vault_entries.message_id is nullable
+                # and a single NULL would make NOT IN match nothing
+                ~exists().where(VaultEntry.message_id == Message.id)
+            ).order_by(Message.id)
+        )
+        return result.scalars().all()
+
+    async def get_vault_entry(self, db: AsyncSession, secure_id: str) -> Optional[VaultEntry]:
+        """
+        Retrieve a vault entry by its secure ID. A full vault link is accepted too.
+        """
+        try:
+            result = await db.execute(
+                select(VaultEntry).where(
+                    VaultEntry.secure_id == self.parse_secure_id(str(secure_id)),
+                    VaultEntry.is_archived == False
+                )
+            )
+            entry = result.scalars().first()
             
             if entry:
                 logger.info(f"Vault entry retrieved successfully: {entry.id}")
             else:
-                logger.warning(f"Vault entry not found: {vault_link}")
+                logger.warning(f"Vault entry not found: {secure_id}")
                 
             return entry
         except Exception as e:
             logger.error(f"Error retrieving vault entry: {e}")
             return None
 
+    def encode_cursor(self, entry: VaultEntry) -> str:
+        """
+        Encode the position after entry as an opaque cursor token.
+        """
+        raw = json.dumps([entry.created_at.isoformat(), entry.id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> Tuple[datetime, int]:
+        """
+        Decode a cursor token into (created_at, id). Raises ValueError if malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_at, entry_id = json.loads(raw)
+            return datetime.fromisoformat(created_at), int(entry_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
     async def list_vault_entries(
         self,
-        db: Session,
+        db: AsyncSession,
         conversation_id: Optional[str] = None,
         user_id: Optional[str] = None,
-        page: int = 1,
+        cursor: Optional[str] = None,
         page_size: int = 20
-    ) -> List[VaultEntry]:
+    ) -> Tuple[List[VaultEntry], Optional[str]]:
         """
-        List vault entries with optional filtering.
+        List vault entries with optional filtering, newest first.
+        Uses keyset pagination on (created_at, id): pass the returned next_cursor
+        to get the following page; it is None on the last page.
+        Raises ValueError for a malformed cursor.
         """
+        position = self.decode_cursor(cursor) if cursor else None
+
         try:
-            query = db.query(VaultEntry).filter(VaultEntry.is_archived == False)
+            query = select(VaultEntry).where(VaultEntry.is_archived == False)
             
             if conversation_id:
-                query = query.filter(VaultEntry.conversation_id == conversation_id)
+                query = query.where(VaultEntry.conversation_id == conversation_id)
             if user_id:
-                query = query.filter(VaultEntry.user_id == user_id)
-                
-            entries = query.offset((page - 1) * page_size).limit(page_size).all()
+                query = query.where(VaultEntry.user_id == user_id)
+            if position:
+                query = query.where(tuple_(VaultEntry.created_at, VaultEntry.id) < position)
+
+            # One extra row tells us whether there is a next page
+            query = query.order_by(VaultEntry.created_at.desc(), VaultEntry.id.desc()).limit(page_size + 1)
+            result = await db.execute(query)
+            entries = result.scalars().all()
+
+            next_cursor = None
+            if len(entries) > page_size:
+                entries = entries[:page_size]
+                next_cursor = self.encode_cursor(entries[-1])
+
             logger.info(f"Retrieved {len(entries)} vault entries")
-            return entries
+            return entries, next_cursor
         except Exception as e:
             logger.error(f"Error listing vault entries: {e}")
-            return []
+            return [], None
+
+    EXPORT_COLUMNS = (
+        "id", "message_id", "conversation_id", "user_id", "original_message",
+        "secure_id", "is_archived", "created_at", "updated_at", "entry_metadata"
+    )
+    # vault_link is composed from secure_id while exporting
+    EXPORT_FIELDS = EXPORT_COLUMNS + ("vault_link",)
+
+    async def export_vault_entries(
+        self,
+        export_format: str = "ndjson",
+        conversation_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        is_archived: Optional[bool] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream vault entries as NDJSON lines or CSV rows.
+        Rows are read through a server-side cursor in batches of
+        VAULT_EXPORT_BATCH_SIZE and encoded one batch at a time, so memory stays
+        constant regardless of the export size. Opens its own session because the
+        response is streamed after the request's session has been closed.
+        """
+        columns = [getattr(VaultEntry, name) for name in self.EXPORT_COLUMNS]
+        query = select(*columns)
+        if conversation_id:
+            query = query.where(VaultEntry.conversation_id == conversation_id)
+        if user_id:
+            query = query.where(VaultEntry.user_id == user_id)
+        if created_from:
+            query = query.where(VaultEntry.created_at >= created_from)
+        if created_to:
+            query = query.where(VaultEntry.created_at < created_to)
+        if is_archived is not None:
+            query = query.where(VaultEntry.is_archived == is_archived)
+        query = query.order_by(VaultEntry.id).execution_options(yield_per=settings.VAULT_EXPORT_BATCH_SIZE)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(self.EXPORT_FIELDS)
+            yield buffer.getvalue()
+
+        total = 0
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.stream(query)
+                async for rows in result.partitions():
+                    buffer.seek(0)
+                    buffer.truncate()
+                    for row in rows:
+                        row = (*row, self.build_vault_link(row.secure_id))
+                        if export_format == "csv":
+                            writer.writerow(
+                                json.dumps(value) if isinstance(value, dict) else value
+                                for value in row
+                            )
+                        else:
+                            buffer.write(json.dumps(dict(zip(self.EXPORT_FIELDS, row)), default=str))
+                            buffer.write("\n")
+                    total += len(rows)
+                    yield buffer.getvalue()
+            logger.info(f"Exported {total} vault entries as {export_format}")
+        except Exception as e:
+            logger.error(f"Error exporting vault entries after {total} rows: {e}")
+            raise
 
     async def add_feedback(
         self,
-        db: Session,
+        db: AsyncSession,
         vault_entry_id: int,
         is_positive: bool,
         feedback_notes: str,
@@ -118,31 +290,31 @@ class VaultService:
             )
 
             db.add(feedback)
-            db.commit()
-            db.refresh(feedback)
+            await db.commit()
+            await db.refresh(feedback)
             logger.info(f"Feedback added successfully for vault entry: {vault_entry_id}")
             return feedback
         except Exception as e:
             logger.error(f"Error adding feedback: {e}")
-            db.rollback()
+            await db.rollback()
             raise
 
-    async def archive_vault_entry(self, db: Session, vault_entry_id: int) -> bool:
+    async def archive_vault_entry(self, db: AsyncSession, vault_entry_id: int) -> bool:
         """
         Archive a vault entry.
         """
         try:
-            entry = db.query(VaultEntry).filter(VaultEntry.id == vault_entry_id).first()
+            entry = await db.get(VaultEntry, vault_entry_id)
             if entry:
                 entry.is_archived = True
-                db.commit()
+                await db.commit()
                 logger.info(f"Vault entry archived successfully: {vault_entry_id}")
                 return True
             logger.warning(f"Vault entry not found for archiving: {vault_entry_id}")
             return False
         except Exception as e:
             logger.error(f"Error archiving vault entry: {e}")
-            db.rollback()
+            await db.rollback()
             return False
 
     def generate_intercom_note(self, vault_link: str) -> str:
@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.model_registry import MODEL_REGISTRY
+from app.services.training_service import TrainingService
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+def inference_cost(training_service: TrainingService, texts: List[str], batch_size: int) -> Dict[str, float]:
+    """
+    Milliseconds per message for batched inference over texts.
+    """
+    training_service.predict_proba(texts[:batch_size])
+    started = time.perf_counter()
+    probabilities = []
+    for start in range(0, len(texts), batch_size):
+        probabilities.extend(training_service.predict_proba(texts[start:start + batch_size]))
+    elapsed = time.perf_counter() - started
+    return {"ms_per_message": round(elapsed / len(texts) * 1000, 3), "probabilities": probabilities}
+
+async def distill(teacher_version: str, student_architecture: str, version: str, batch_size: int) -> Dict:
+    """
+    Distill the teacher version into a student architecture on the validated
+    training data and save it as a new model version.
+    """
+    teacher = TrainingService(backend="pytorch")
+    teacher.load_version(teacher_version)
+
+    with SessionLocal() as db:
+        training_data = await teacher.prepare_training_data(db)
+    if not training_data:
+        raise SystemExit("No validated training data to distill on")
+
+    student = TrainingService(architecture=student_architecture)
+    student.current_version = version
+    await student.distill_model(training_data, teacher)
+
+    texts = [item["text"] or "" for item in training_data]
+    teacher_cost = inference_cost(teacher, texts, batch_size)
+    student_cost = inference_cost(student, texts, batch_size)
+    agreement = sum(
+        (teacher_probability >= 0.5) == (student_probability >= 0.5)
+        for teacher_probability, student_probability in zip(teacher_cost["probabilities"], student_cost["probabilities"])
+    ) / len(texts)
+
+    return {
+        "teacher_version": teacher_version,
+        "student_architecture": student_architecture,
+        "student_version": version,
+        "examples": len(texts),
+        "agreement_with_teacher": round(agreement, 4),
+        "teacher_ms_per_message": teacher_cost["ms_per_message"],
+        "student_ms_per_message": student_cost["ms_per_message"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the sensitivity classifier into a smaller model.")
+    parser.add_argument("--teacher-version", default=settings.MODEL_VERSION, help="Saved model version to learn from")
+    parser.add_argument("--student", default="distilbert", choices=list(MODEL_REGISTRY), help="Student architecture")
+    parser.add_argument("--version", required=True, help="Model version to save the student as")
+    parser.add_argument("--batch-size", type=int, default=settings.ML_EVAL_BATCH_SIZE, help="Batch size for the cost comparison")
+    args = parser.parse_args()
+
+    report = asyncio.run(distill(args.teacher_version, args.student, args.version, args.batch_size))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.message import Message
+from app.services.model_backends import BACKENDS, export_onnx, export_quantized
+from app.services.training_service import TrainingService
+from datetime import datetime
+from typing import Dict, List, Tuple
+import argparse
+import json
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+def export(version: str, formats: List[str]) -> None:
+    """
+    Write int8 and/or ONNX exports of a saved model version into its directory.
+    """
+    training_service = TrainingService(backend="pytorch")
+    training_service.load_version(version)
+    model_path = f"./models/version_{version}"
+    if "quantized" in formats:
+        export_quantized(training_service.model, model_path)
+    if "onnx" in formats:
+        export_onnx(training_service.model, training_service.tokenizer, model_path)
+
+def load_samples(limit: int) -> Tuple[List[str], List[int]]:
+    """
+    Most recent messages with their blocked flag as the label.
+    """
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Message.original_text, Message.is_blocked)
+            .order_by(Message.created_at.desc())
+            .limit(limit)
+        ).all()
+    return [row.original_text or "" for row in rows], [1 if row.is_blocked else 0 for row in rows]
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def _directory_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+def measure(training_service: TrainingService, texts: List[str], batch_size: int) -> Tuple[List[float], Dict]:
+    """
+    Run texts through the service's backend in batches and time each batch.
+    """
+    # One untimed batch so lazy initialisation is not counted
+    training_service.predict_proba(texts[:batch_size])
+
+    probabilities = []
+    batch_seconds = []
+    for start in range(0, len(texts), batch_size):
+        started = time.perf_counter()
+        probabilities.extend(training_service.predict_proba(texts[start:start + batch_size]))
+        batch_seconds.append(time.perf_counter() - started)
+
+    total = sum(batch_seconds)
+    batch_seconds.sort()
+    return probabilities, {
+        "messages_per_second": round(len(texts) / total, 1) if total else None,
+        "ms_per_message": round(total / len(texts) * 1000, 3),
+        "batch_latency_ms": {
+            "p50": round(_percentile(batch_seconds, 50) * 1000, 2),
+            "p95": round(_percentile(batch_seconds, 95) * 1000, 2)
+        }
+    }
+
+def compare(version: str, backends: List[str], samples: int, batch_size: int) -> Dict:
+    """
+    Compare backends against the fp32 model on accuracy, agreement and latency.
+    """
+    texts, labels = load_samples(samples)
+    if not texts:
+        raise SystemExit("No messages in the database to compare on")
+    model_path = f"./models/version_{version}"
+    threshold = 0.5
+
+    results = {}
+    reference = None
+    for backend in ["pytorch"] + [name for name in backends if name != "pytorch"]:
+        training_service = TrainingService(backend=backend)
+        training_service.load_version(version)
+        probabilities, timing = measure(training_service, texts, batch_size)
+        predictions = [1 if probability >= threshold else 0 for probability in probabilities]
+        if reference is None:
+            reference = (probabilities, predictions)
+
+        result = {
+            "backend_class": (
+                type(training_service.get_backend()).__name__
+                if training_service.model_type == "transformer" else "TfidfClassifier"
+            ),
+            "accuracy": round(sum(p == l for p, l in zip(predictions, labels)) / len(labels), 4),
+            "agreement_with_fp32": round(sum(p == r for p, r in zip(predictions, reference[1])) / len(labels), 4),
+            "max_probability_delta": round(max(abs(p - r) for p, r in zip(probabilities, reference[0])), 5),
+            **timing
+        }
+        if backend == "quantized":
+            result["size_bytes"] = _directory_size(os.path.join(model_path, "quantized"))
+        elif backend == "onnx":
+            result["size_bytes"] = _directory_size(os.path.join(model_path, "onnx"))
+        else:
+            result["size_bytes"] = sum(
+                _directory_size(os.path.join(model_path, name))
+                for name in os.listdir(model_path)
+                if name.endswith((".bin", ".safetensors"))
+            )
+        results[backend] = result
+        logger.info(f"{backend}: {result}")
+
+    fp32_ms = results["pytorch"]["ms_per_message"]
+    for result in results.values():
+        result["speedup_vs_fp32"] = round(fp32_ms / result["ms_per_message"], 2) if result["ms_per_message"] else None
+
+    return {
+        "model_version": version,
+        "samples": len(texts),
+        "batch_size": batch_size,
+        "threads": settings.ML_TORCH_THREADS or "default",
+        "created_at": datetime.utcnow().isoformat(),
+        "backends": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the sensitivity classifier for faster CPU inference.")
+    parser.add_argument("--version", default=settings.MODEL_VERSION, help="Saved model version under ./models")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write int8 and/or ONNX exports")
+    export_parser.add_argument("--format", choices=["quantized", "onnx", "all"], default="all")
+
+    compare_parser = subparsers.add_parser("compare", help="Accuracy vs latency report against the fp32 model")
+    compare_parser.add_argument("--backends", default="quantized,onnx", help=f"Comma-separated, from {', '.join(BACKENDS)}")
+    compare_parser.add_argument("--samples", type=int, default=1000, help="Recent messages to evaluate on")
+    compare_parser.add_argument("--batch-size", type=int, default=settings.ML_BATCH_MAX_SIZE)
+    compare_parser.add_argument("--output", help="Also write the JSON report to this file")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.version, ["quantized", "onnx"] if args.format == "all" else [args.format])
+        return
+
+    report = compare(args.version, [name for name in args.backends.split(",") if name], args.samples, args.batch_size)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
\ No newline at end of file
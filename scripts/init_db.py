@@ -8,11 +8,15 @@ from app.models.message import Message
 from app.models.vault import VaultEntry, VaultFeedback
 from app.models.detection import DetectionFinding
 from app.models.training import TrainingData
+from app.models.outbox import OutboxMessage
+from app.models.stats import DetectionStatsHourly, FindingStatsHourly
 from app.services.auth_service import AuthService
+from scripts.migrate_vault_secure_ids import migrate as migrate_vault_secure_ids
 from datetime import datetime
 import logging
 import asyncio
-from app.core.database import SessionLocal
+import uuid
+from app.core.database import SessionLocal, AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,11 @@ async def init_db():
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully!")
 
+        # create_all skips existing tables, so add columns and indexes introduced since
+        migrate_vault_secure_ids(engine)
+        for index in Message.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
         # Create a session
         db = SessionLocal()
 
@@ -32,14 +41,16 @@ async def init_db():
         # Create admin user if it doesn't exist
         admin_user = db.query(User).filter(User.username == "admin").first()
         if not admin_user:
-            await auth_service.create_user(
-                db=db,
-                username='admin',
-                email='admin@example.com',
-                password='admin',
-                full_name='Admin User',
-                role='ADMIN'
-            )
+            # AuthService works on async sessions
+            async with AsyncSessionLocal() as async_db:
+                await auth_service.create_user(
+                    db=async_db,
+                    username='admin',
+                    email='admin@example.com',
+                    password='admin',
+                    full_name='Admin User',
+                    role='ADMIN'
+                )
             logger.info("Admin user created successfully!")
 
         # Create some mock messages
@@ -79,8 +90,8 @@ async def init_db():
                 conversation_id="conv_1",
                 user_id="user_1",
                 original_message="Here is my credit card: 4111-1111-1111-1111",
-                vault_link="https://vault.example.com/view/abc123",
-                metadata={
+                secure_id=uuid.UUID("5b1f7e0c-3c52-4f0e-9a7d-1d2b8f6a0c11"),
+                entry_metadata={
                     "redaction_timestamp": datetime.utcnow().isoformat(),
                     "detection_method": "regex",
                     "confidence_score": 1.0
@@ -91,8 +102,8 @@ async def init_db():
                 conversation_id="conv_2",
                 user_id="user_2",
                 original_message="My email is john.doe@example.com",
-                vault_link="https://vault.example.com/view/def456",
-                metadata={
+                secure_id=uuid.UUID("9e4a2d6b-8f13-4c7a-b5e0-6a3c1f9d2e42"),
+                entry_metadata={
                     "redaction_timestamp": datetime.utcnow().isoformat(),
                     "detection_method": "regex",
                     "confidence_score": 1.0
@@ -101,7 +112,7 @@ async def init_db():
         ]
 
         for entry in mock_vault_entries:
-            existing = db.query(VaultEntry).filter(VaultEntry.vault_link == entry.vault_link).first()
+            existing = db.query(VaultEntry).filter(VaultEntry.secure_id == entry.secure_id).first()
             if not existing:
                 db.add(entry)
         
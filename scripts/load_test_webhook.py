@@ -0,0 +1,254 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.api.api_v1.endpoints.mock import generate_mock_message
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import random
+import time
+import httpx
+import uvicorn
+
+CLEAN_MESSAGES = [
+    "Hi, I have a question about my latest invoice.",
+    "The dashboard has been loading slowly since this morning, can you take a look?",
+    "How do I invite a colleague to our workspace?",
+    "Thanks, that fixed it!"
+]
+
+def create_stub_app(latency_ms: float, jitter_ms: float, rate_limit: int, error_rate: float) -> FastAPI:
+    """
+    Build a stand-in for the Intercom API.
+    Replies are delayed by latency_ms (plus up to jitter_ms), requests above
+    rate_limit per second get a 429 with Intercom's rate limit headers, and
+    error_rate of the remaining requests fail with a 503.
+    """
+    stub = FastAPI(title="Intercom stub")
+    state = {"window": 0, "count": 0}
+    counts = Counter()
+
+    def rate_limit_headers(remaining: int) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(state["window"] + 1)
+        }
+
+    async def respond(payload: Dict) -> JSONResponse:
+        if rate_limit > 0:
+            window = int(time.time())
+            if window != state["window"]:
+                state["window"] = window
+                state["count"] = 0
+            state["count"] += 1
+            remaining = rate_limit - state["count"]
+            if remaining < 0:
+                counts["rate_limited"] += 1
+                headers = rate_limit_headers(remaining)
+                headers["Retry-After"] = "1"
+                return JSONResponse({"type": "error.list", "errors": [{"code": "rate_limit_exceeded"}]}, status_code=429, headers=headers)
+            headers = rate_limit_headers(remaining)
+        else:
+            headers = {}
+
+        await asyncio.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+        if random.random() < error_rate:
+            counts["errors"] += 1
+            return JSONResponse({"type": "error.list", "errors": [{"code": "service_unavailable"}]}, status_code=503, headers=headers)
+        counts["ok"] += 1
+        return JSONResponse(payload, headers=headers)
+
+    @stub.post("/conversations/{conversation_id}/reply")
+    async def reply(conversation_id: str, request: Request):
+        body = await request.json()
+        counts["replies"] += 1
+        return await respond({"type": "conversation", "id": conversation_id, "body": body.get("body")})
+
+    @stub.get("/conversations/{conversation_id}")
+    async def conversation(conversation_id: str):
+        return await respond({"type": "conversation", "id": conversation_id})
+
+    @stub.get("/_stats")
+    async def stats():
+        return dict(counts)
+
+    return stub
+
+def build_payloads(count: int, density: float, topic: str) -> List[bytes]:
+    """
+    Build count serialized webhook payloads; density is the fraction that
+    carries sensitive data from the mock message generator.
+    """
+    payloads = []
+    for i in range(count):
+        if random.random() < density:
+            text, _, _ = generate_mock_message()
+        else:
+            text = random.choice(CLEAN_MESSAGES)
+        payloads.append(json.dumps({
+            "type": "notification_event",
+            "topic": topic,
+            "data": {
+                "item": {
+                    "id": f"LOAD-MSG-{i}",
+                    "conversation_id": f"LOAD-CONV-{i % 1000}",
+                    "body": text
+                }
+            }
+        }).encode())
+    return payloads
+
+def sign(body: bytes, secret: str) -> str:
+    """
+    Sign a payload the way verify_intercom_signature checks it.
+    """
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+async def run_load(
+    url: str,
+    payloads: List[bytes],
+    secret: str,
+    topic: str,
+    concurrency: int,
+    warmup: int,
+    timeout: float
+) -> Dict:
+    """
+    POST every payload to the webhook with concurrency requests in flight and
+    collect per-request latency and status codes. The first warmup requests
+    are sent but not measured.
+    """
+    latencies = []
+    statuses = Counter()
+
+    async def send_all(client: httpx.AsyncClient, bodies: List[bytes], measure: bool) -> None:
+        pending = iter(bodies)
+
+        async def worker():
+            # The iterator is shared, so each payload is sent exactly once
+            for body in pending:
+                headers = {
+                    "Content-Type": "application/json",
+                    "X-Hub-Signature": sign(body, secret),
+                    "X-Intercom-Topic": topic
+                }
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, content=body, headers=headers)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if measure:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        await send_all(client, payloads[:warmup], measure=False)
+        started = time.perf_counter()
+        await send_all(client, payloads[warmup:], measure=True)
+        duration = time.perf_counter() - started
+
+    latencies.sort()
+    measured = len(latencies)
+    return {
+        "requests": measured,
+        "concurrency": concurrency,
+        "duration_seconds": round(duration, 3),
+        "throughput_rps": round(measured / duration, 1) if duration else None,
+        "latency_ms": {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (
+                ("p50", percentile(latencies, 50)),
+                ("p95", percentile(latencies, 95)),
+                ("p99", percentile(latencies, 99)),
+                ("max", latencies[-1] if latencies else None)
+            )
+        },
+        "status_codes": dict(statuses)
+    }
+
+async def fetch_stub_stats(stub_url: str) -> Optional[Dict]:
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.get(f"{stub_url.rstrip('/')}/_stats")
+            response.raise_for_status()
+            return response.json()
+    except httpx.HTTPError:
+        return None
+
+async def run(args) -> None:
+    random.seed(args.seed)
+    payloads = build_payloads(args.requests + args.warmup, args.density, args.topic)
+    url = f"{args.target.rstrip('/')}{settings.API_V1_STR}/intercom/webhook"
+    print(f"Sending {args.requests} requests (+{args.warmup} warm-up) to {url} with concurrency {args.concurrency}", file=sys.stderr)
+    report = await run_load(url, payloads, args.secret, args.topic, args.concurrency, args.warmup, args.timeout)
+    report["target"] = url
+    report["finding_density"] = args.density
+    report["created_at"] = datetime.utcnow().isoformat()
+    if args.stub_url:
+        # Replies may still be in the outbox; the stub only sees what was delivered so far
+        report["stub"] = await fetch_stub_stats(args.stub_url)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Intercom webhook against a local Intercom stand-in.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stub_parser = subparsers.add_parser("stub", help="Serve a local Intercom API stand-in")
+    stub_parser.add_argument("--host", default="127.0.0.1")
+    stub_parser.add_argument("--port", type=int, default=8081)
+    stub_parser.add_argument("--latency-ms", type=float, default=50, help="Base response latency")
+    stub_parser.add_argument("--jitter-ms", type=float, default=20, help="Extra random latency up to this value")
+    stub_parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before answering 429 (0 disables)")
+    stub_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+
+    run_parser = subparsers.add_parser("run", help="Drive the webhook endpoint")
+    run_parser.add_argument("--target", default="http://127.0.0.1:8000", help="Base URL of the app under test")
+    run_parser.add_argument("--requests", type=int, default=1000)
+    run_parser.add_argument("--concurrency", type=int, default=50)
+    run_parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests sent first")
+    run_parser.add_argument("--density", type=float, default=0.3, help="Fraction of messages with sensitive data")
+    run_parser.add_argument("--topic", default="conversation.replied")
+    run_parser.add_argument("--secret", default=settings.INTERCOM_ACCESS_TOKEN, help="Signing secret (default: INTERCOM_ACCESS_TOKEN)")
+    run_parser.add_argument("--timeout", type=float, default=30)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--stub-url", help="Stub base URL, to include its delivery counts in the report")
+    run_parser.add_argument("--output", help="Also write the JSON report to this file")
+
+    args = parser.parse_args()
+    if args.command == "stub":
+        stub = create_stub_app(args.latency_ms, args.jitter_ms, args.rate_limit, args.error_rate)
+        uvicorn.run(stub, host=args.host, port=args.port, log_level="warning")
+    else:
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
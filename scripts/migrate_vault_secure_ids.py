@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.database import engine
+# Every model must be imported so VaultEntry's relationships resolve
+from app.models.user import User  # noqa: F401
+from app.models.message import Message  # noqa: F401
+from app.models.vault import VaultEntry, VaultFeedback  # noqa: F401
+from app.models.detection import DetectionFinding  # noqa: F401
+from app.models.training import TrainingData  # noqa: F401
+import argparse
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+def _secure_id_from_link(vault_link: str) -> uuid.UUID:
+    """
+    Reuse the UUID at the end of a legacy vault link, or issue a new one.
+    """
+    try:
+        return uuid.UUID((vault_link or "").rstrip("/").rsplit("/", 1)[-1])
+    except ValueError:
+        return uuid.uuid4()
+
+def migrate(engine: Engine, batch_size: int = 1000, clear_links: bool = False) -> int:
+    """
+    Add the secure_id column and its index to vault_entries and backfill it
+    from the legacy vault_link URLs in batches. Safe to run repeatedly: only
+    rows without a secure_id are touched, and a UUID already taken by another
+    row is never reused.
+    With clear_links, vault_link is set to NULL, which shrinks the old unique
+    index on the URL column. Links are only cleared once every row has a
+    secure_id; otherwise a ValueError is raised and no link is cleared.
+    Returns the number of rows backfilled.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns(VaultEntry.__tablename__)}
+    if "secure_id" not in columns:
+        column_type = VaultEntry.__table__.c.secure_id.type.compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {VaultEntry.__tablename__} ADD COLUMN secure_id {column_type}"))
+        logger.info("Added secure_id column to vault_entries")
+
+    for index in VaultEntry.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    total = 0
+    while True:
+        with Session(engine) as db:
+            rows = db.execute(
+                select(VaultEntry.id, VaultEntry.vault_link)
+                .where(VaultEntry.secure_id.is_(None))
+                .order_by(VaultEntry.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            candidates = {row.id: _secure_id_from_link(row.vault_link) for row in rows}
+            taken = set(db.execute(
+                select(VaultEntry.secure_id).where(VaultEntry.secure_id.in_(set(candidates.values())))
+            ).scalars())
+            values = []
+            for row_id, secure_id in candidates.items():
+                # Duplicate or already used link UUIDs get a fresh one
+                if secure_id in taken:
+                    secure_id = uuid.uuid4()
+                taken.add(secure_id)
+                values.append({"id": row_id, "secure_id": secure_id})
+
+            # ORM bulk UPDATE by primary key, one executemany per batch
+            db.execute(update(VaultEntry), values)
+            db.commit()
+            total += len(rows)
+            logger.info(f"Backfilled secure_id for {total} vault entries")
+
+    if clear_links:
+        with Session(engine) as db:
+            missing = db.execute(
+                select(func.count()).select_from(VaultEntry).where(VaultEntry.secure_id.is_(None))
+            ).scalar()
+            if missing:
+                raise ValueError(f"{missing} vault entries have no secure_id yet, not clearing vault links")
+            db.execute(update(VaultEntry).where(VaultEntry.vault_link.is_not(None)).values(vault_link=None))
+            db.commit()
+
+    logger.info(f"Vault secure_id migration completed, {total} rows backfilled")
+    return total
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Move vault link lookups to the secure_id column")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--clear-links", action="store_true", help="Set the legacy vault_link column to NULL")
+    args = parser.parse_args()
+    try:
+        migrate(engine, batch_size=args.batch_size, clear_links=args.clear_links)
+    except ValueError as e:
+        raise SystemExit(str(e))
\ No newline at end of file
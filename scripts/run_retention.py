@@ -0,0 +1,17 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.retention_service import RetentionService
+import asyncio
+import json
+import logging
+
+async def run_retention():
+    """Run a single retention sweep and print its report."""
+    report = await RetentionService().run_once()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_retention())
\ No newline at end of file
@@ -0,0 +1,24 @@
+import os
+import tempfile
+import pytest
+
+# Settings are read at import time, so point them at a throwaway database
+# before anything under app/ is imported
+_db_dir = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["INTERCOM_ACCESS_TOKEN"] = "test-intercom-token"
+os.environ["ENABLE_ML_DETECTION"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["VAULT_RETENTION_ENABLED"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"  # the minimum, so hashing in tests is fast
+
+@pytest.fixture(scope="session")
+def tables():
+    """
+    Create every table in the test database.
+    """
+    from app.core.database import Base, engine
+    from app.models import detection, message, outbox, stats, training, user, vault  # noqa: F401
+    Base.metadata.create_all(bind=engine)
+    return engine
\ No newline at end of file
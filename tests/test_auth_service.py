@@ -0,0 +1,49 @@
+import threading
+import uuid
+import pytest
+from app.core.database import AsyncSessionLocal
+from app.services import auth_service as auth_module
+from app.services.auth_service import AuthService
+
+@pytest.fixture
+async def db(tables):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+async def _create_user(db, service: AuthService, password: str = "correct horse"):
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    return await service.create_user(db, name, f"{name}@example.com", password, "Test User")
+
+async def test_hashing_runs_on_the_bcrypt_pool():
+    thread_name = await auth_module._run_hash_task(lambda: threading.current_thread().name)
+    assert thread_name.startswith("bcrypt")
+
+async def test_verified_credentials_are_cached(db, monkeypatch):
+    service = AuthService()
+    user = await _create_user(db, service)
+    calls = []
+    verify = service.verify_and_update_password
+
+    async def counting_verify(password, hashed_password):
+        calls.append(password)
+        return await verify(password, hashed_password)
+
+    monkeypatch.setattr(service, "verify_and_update_password", counting_verify)
+    assert (await service.authenticate_user(db, user.username, "correct horse")).id == user.id
+    assert (await service.authenticate_user(db, user.username, "correct horse")).id == user.id
+    assert calls == ["correct horse"]
+
+    # Wrong passwords are never cached and always checked
+    assert await service.authenticate_user(db, user.username, "wrong") is None
+    assert await service.authenticate_user(db, user.username, "wrong") is None
+    assert calls == ["correct horse", "wrong", "wrong"]
+
+async def test_password_change_invalidates_cached_credentials(db):
+    service = AuthService()
+    user = await _create_user(db, service)
+    assert await service.authenticate_user(db, user.username, "correct horse") is not None
+
+    user.hashed_password = await service.hash_password("new password")
+    await db.commit()
+    assert await service.authenticate_user(db, user.username, "correct horse") is None
+    assert await service.authenticate_user(db, user.username, "new password") is not None
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import database
+
+def test_async_database_url_maps_drivers():
+    assert database.get_async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert database.get_async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert database.get_async_database_url("postgres://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+def test_async_engine_uses_a_queue_pool_for_sqlite():
+    assert isinstance(database.async_engine.pool, AsyncAdaptedQueuePool)
+    assert database.async_engine.pool.size() == 5
+
+async def test_async_session_executes_queries():
+    async with database.AsyncSessionLocal() as db:
+        assert (await db.execute(text("SELECT 1"))).scalar() == 1
\ No newline at end of file
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from sqlalchemy import delete
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.outbox import OutboxMessage
+from app.services import delivery_service as delivery_module
+from app.services.delivery_service import DeliveryService
+
+class FakeIntercom:
+    """
+    Stands in for IntercomService.post_reply, recording every send.
+    """
+
+    def __init__(self, outcome=None, delay: float = 0):
+        self.outcome = outcome
+        self.delay = delay
+        self.sent = []
+        self.connections_in_use = []
+
+    async def post_reply(self, conversation_id: str, message: str) -> httpx.Response:
+        self.connections_in_use.append(async_engine.pool.checkedout())
+        await asyncio.sleep(self.delay)
+        self.sent.append((conversation_id, message))
+        request = httpx.Request("POST", "https://api.intercom.io/conversations/reply")
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        if isinstance(self.outcome, int):
+            response = httpx.Response(self.outcome, request=request)
+            raise httpx.HTTPStatusError("error", request=request, response=response)
+        return httpx.Response(200, request=request)
+
+@pytest.fixture
+async def outbox(tables):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(OutboxMessage))
+        await db.commit()
+    yield
+
+async def _add(**values) -> int:
+    async with AsyncSessionLocal() as db:
+        message = OutboxMessage(conversation_id="c1", body="hello", **values)
+        db.add(message)
+        await db.commit()
+        return message.id
+
+async def _get(message_id: int) -> OutboxMessage:
+    async with AsyncSessionLocal() as db:
+        return await db.get(OutboxMessage, message_id)
+
+async def test_concurrent_workers_send_a_message_once(outbox):
+    message_id = await _add()
+    intercom = FakeIntercom(delay=0.05)
+    # Two services stand in for two app worker processes sharing the outbox
+    services = [DeliveryService(intercom), DeliveryService(intercom)]
+    await asyncio.gather(*(service._deliver(message_id) for service in services for _ in range(3)))
+
+    assert intercom.sent == [("c1", "hello")]
+    message = await _get(message_id)
+    assert message.status == "sent"
+    assert message.attempts == 1
+
+async def test_no_connection_is_held_while_sending(outbox):
+    message_id = await _add()
+    intercom = FakeIntercom()
+    await DeliveryService(intercom)._deliver(message_id)
+    assert intercom.connections_in_use == [0]
+
+async def test_unexpected_errors_are_rescheduled(outbox):
+    message_id = await _add()
+    service = DeliveryService(FakeIntercom(outcome=RuntimeError("boom")))
+    service._queue = asyncio.Queue()
+    await service._deliver(message_id)
+
+    message = await _get(message_id)
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert message.last_error == "boom"
+    assert len(service._retry_handles) == 1
+    for handle in service._retry_handles:
+        handle.cancel()
+
+async def test_database_errors_are_rescheduled(outbox, monkeypatch):
+    message_id = await _add()
+    service = DeliveryService(FakeIntercom())
+    service._queue = asyncio.Queue()
+
+    async def broken_claim(message_id):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(service, "_claim", broken_claim)
+    service._queue.put_nowait(message_id)
+    worker = asyncio.create_task(service._worker())
+    await service._queue.join()
+    worker.cancel()
+
+    assert len(service._retry_handles) == 1
+    for handle in service._retry_handles:
+        handle.cancel()
+
+async def test_client_errors_fail_without_retry(outbox):
+    message_id = await _add()
+    await DeliveryService(FakeIntercom(outcome=400))._deliver(message_id)
+    message = await _get(message_id)
+    assert message.status == "failed"
+    assert message.attempts == 1
+
+async def test_expired_claims_are_taken_over(outbox, monkeypatch):
+    monkeypatch.setattr(delivery_module.settings, "INTERCOM_DELIVERY_CONCURRENCY", 1)
+    now = datetime.utcnow()
+    expired = await _add(status="sending", attempts=1, next_attempt_at=now - timedelta(seconds=1))
+    live = await _add(status="sending", attempts=1, next_attempt_at=now + timedelta(minutes=5))
+    intercom = FakeIntercom()
+    service = DeliveryService(intercom)
+    await service.start()
+    try:
+        await service._queue.join()
+    finally:
+        await service.stop()
+
+    assert (await _get(expired)).status == "sent"
+    assert (await _get(live)).status == "sending"
+    assert intercom.sent == [("c1", "hello")]
\ No newline at end of file
@@ -0,0 +1,74 @@
+from datetime import timedelta
+import uuid
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.api import deps
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.main import app
+from app.models.user import UserRole
+
+class NoDatabase:
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("the database should not be queried")
+
+@pytest.fixture
+async def db(tables):
+    async with AsyncSessionLocal() as session:
+        yield session
+
+async def _user_and_token(db, expires=timedelta(minutes=5), role=UserRole.VIEWER):
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    user = await deps.auth_service.create_user(db, name, f"{name}@example.com", "password", "Test User", role)
+    return user, deps.auth_service.create_access_token({"sub": name}, expires)
+
+async def test_principal_is_cached_per_token(db):
+    user, token = await _user_and_token(db)
+    assert (await deps.get_current_user(db, token)).id == user.id
+    assert (await deps.get_current_user(NoDatabase(), token)).id == user.id
+
+async def test_user_changes_drop_cached_principals(db):
+    user, token = await _user_and_token(db)
+    await deps.get_current_user(db, token)
+    await deps.auth_service.set_user_active(db, user, False)
+
+    with pytest.raises(AssertionError, match="should not be queried"):
+        await deps.get_current_user(NoDatabase(), token)
+    assert (await deps.get_current_user(db, token)).is_active is False
+
+async def test_expired_tokens_are_rejected_even_when_cached(db):
+    user, token = await _user_and_token(db, expires=timedelta(seconds=-1))
+    deps.auth_service.cache_principal(token, user)
+    with pytest.raises(HTTPException) as error:
+        await deps.get_current_user(NoDatabase(), token)
+    assert error.value.status_code == 401
+
+async def test_admin_changes_apply_to_the_next_request(db):
+    user, token = await _user_and_token(db)
+    _, admin_token = await _user_and_token(db, role=UserRole.ADMIN)
+    headers = {"Authorization": f"Bearer {token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        me = f"{settings.API_V1_STR}/auth/me"
+        assert (await client.get(me, headers=headers)).json()["role"] == "viewer"
+
+        response = await client.put(
+            f"{settings.API_V1_STR}/auth/users/{user.id}/role", json={"role": "reviewer"}, headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert (await client.get(me, headers=headers)).json()["role"] == "reviewer"
+        # Only admins may change users
+        response = await client.put(
+            f"{settings.API_V1_STR}/auth/users/{user.id}/role", json={"role": "admin"}, headers=headers
+        )
+        assert response.status_code == 403
+
+        response = await client.put(
+            f"{settings.API_V1_STR}/auth/users/{user.id}/active", json={"is_active": False}, headers=admin_headers
+        )
+        assert response.status_code == 200
+        response = await client.get(me, headers=headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Inactive user"
\ No newline at end of file
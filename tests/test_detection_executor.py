@@ -0,0 +1,68 @@
+import threading
+import pytest
+from app.services import detection_executor
+from app.services.detection_executor import DetectionExecutor
+from app.services.detection_service import DetectionService
+
+TEXTS = ["no digits or anchors here", "call 555-123-4567 or mail a.b@example.org"]
+
+def _expected_stats(texts):
+    service = DetectionService()
+    for text in texts:
+        service.detect_sensitive_data(text)
+    return service.drain_prefilter_stats()
+
+def test_prefilter_stats_are_exact_under_concurrent_threads():
+    service = DetectionService()
+    rounds = 200
+
+    def worker():
+        for _ in range(rounds):
+            for text in TEXTS:
+                service.detect_sensitive_data(text)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    expected = _expected_stats(TEXTS)
+    for pattern_type, stats in service.prefilter_stats.items():
+        assert stats['checked'] == expected[pattern_type]['checked'] * rounds * 8
+        assert stats['skipped'] == expected[pattern_type]['skipped'] * rounds * 8
+
+def test_drain_resets_and_merge_adds():
+    service = DetectionService()
+    service.detect_sensitive_data(TEXTS[0])
+    drained = service.drain_prefilter_stats()
+    assert all(stats == {'checked': 0, 'skipped': 0} for stats in service.prefilter_stats.values())
+
+    service.merge_prefilter_stats(drained)
+    service.merge_prefilter_stats(drained)
+    for pattern_type, stats in service.prefilter_stats.items():
+        assert stats['checked'] == drained[pattern_type]['checked'] * 2
+        assert stats['skipped'] == drained[pattern_type]['skipped'] * 2
+
+def test_process_worker_returns_its_prefilter_counts(monkeypatch):
+    monkeypatch.setattr(detection_executor, "_worker_detection_service", DetectionService())
+    *_, counts = detection_executor._detect_and_mask(TEXTS[1])
+    assert counts == _expected_stats([TEXTS[1]])
+    # The worker's own counters were handed back, so the next call starts from zero
+    *_, counts = detection_executor._detect_and_mask(TEXTS[0])
+    assert counts == _expected_stats([TEXTS[0]])
+
+@pytest.mark.parametrize("process_threshold", [0, 10 ** 9])
+async def test_executor_stats_cover_thread_and_process_paths(monkeypatch, process_threshold):
+    monkeypatch.setattr(detection_executor.settings, "DETECTION_THREAD_WORKERS", 2)
+    monkeypatch.setattr(detection_executor.settings, "DETECTION_PROCESS_WORKERS", 1)
+    service = DetectionService()
+    executor = DetectionExecutor(service)
+    executor.process_threshold = process_threshold
+    executor.start()
+    try:
+        for text in TEXTS:
+            await executor.run(text)
+    finally:
+        executor.shutdown()
+    assert service.prefilter_stats == _expected_stats(TEXTS)
\ No newline at end of file
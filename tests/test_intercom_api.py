@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.api.api_v1.endpoints import intercom
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.main import app
+from app.models.user import User
+from app.schemas.intercom import IntercomWebhookPayload
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="reviewer@example.com")
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+def test_detect_batch_runs_off_the_event_loop():
+    # A plain def endpoint is run in FastAPI's threadpool
+    assert not asyncio.iscoroutinefunction(intercom.detect_batch)
+
+def test_detect_batch_returns_columnar_findings(client):
+    texts = ["nothing here", "call 555-123-4567"]
+    response = client.post(
+        f"{settings.API_V1_STR}/intercom/detect/batch",
+        json={"texts": texts, "include_masked": True}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    expected = intercom.detection_service.detect_many(texts, include_masked=True)
+    assert body == expected
+    assert body["total_texts"] == 2
+    assert body["masked_texts"][0] == texts[0]
+    assert "555-123-4567" not in body["masked_texts"][1]
+
+def test_detect_batch_rejects_oversized_batches(client, monkeypatch):
+    monkeypatch.setattr(settings, "DETECTION_BATCH_MAX_SIZE", 1)
+    response = client.post(f"{settings.API_V1_STR}/intercom/detect/batch", json={"texts": ["a", "b"]})
+    assert response.status_code == 413
+
+def _signed_webhook(client, payload: dict, topic: str = "conversation.created"):
+    body = json.dumps(payload).encode()
+    signature = hmac.new(settings.INTERCOM_ACCESS_TOKEN.encode(), body, hashlib.sha256).hexdigest()
+    return client.post(
+        f"{settings.API_V1_STR}/intercom/webhook",
+        content=body,
+        headers={"X-Hub-Signature": signature, "X-Intercom-Topic": topic, "Content-Type": "application/json"}
+    )
+
+def test_webhook_item_accepts_null_string_fields():
+    item = IntercomWebhookPayload.model_validate_json(
+        '{"topic": null, "data": {"item": {"id": null, "conversation_id": null, "body": null}}}'
+    ).data.item
+    assert item.body is None and item.id is None and item.conversation_id is None
+
+def test_webhook_with_null_body_is_processed(client, tables):
+    response = _signed_webhook(client, {"data": {"item": {"id": "m1", "conversation_id": "c1", "body": None}}})
+    assert response.status_code == 200
+    assert response.json()["findings"] == []
+
+def test_webhook_rejects_bad_signature(client):
+    response = client.post(
+        f"{settings.API_V1_STR}/intercom/webhook",
+        content=b"{}",
+        headers={"X-Hub-Signature": "bad", "X-Intercom-Topic": "conversation.created"}
+    )
+    assert response.status_code == 401
\ No newline at end of file
@@ -0,0 +1,43 @@
+import httpx
+import pytest
+from app.core.config import settings
+from app.services import intercom_service as intercom_module
+from app.services.intercom_service import IntercomService
+
+@pytest.fixture
+def intercom(monkeypatch):
+    requests = []
+    clients = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/busy/reply"):
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        return httpx.Response(200, json={"id": "reply"})
+
+    class RecordingClient(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            clients.append(kwargs)
+            super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(intercom_module.httpx, "AsyncClient", RecordingClient)
+    return IntercomService(), requests, clients
+
+async def test_requests_share_one_pooled_client(intercom):
+    service, requests, clients = intercom
+    assert await service.send_message("c1", "first") == {"id": "reply"}
+    assert await service.send_message("c2", "second") == {"id": "reply"}
+
+    assert len(clients) == 1
+    assert clients[0]["limits"].max_connections == settings.INTERCOM_HTTP_MAX_CONNECTIONS
+    assert [request.url.path for request in requests] == ["/conversations/c1/reply", "/conversations/c2/reply"]
+    assert all(request.headers["Authorization"] == f"Bearer {settings.INTERCOM_ACCESS_TOKEN}" for request in requests)
+    await service.shutdown()
+    assert service.client is None
+
+async def test_post_reply_raises_for_error_status(intercom):
+    service, _, _ = intercom
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        await service.post_reply("busy", "hello")
+    assert error.value.response.status_code == 429
+    await service.shutdown()
\ No newline at end of file
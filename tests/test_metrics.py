@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+from app.core.metrics import DEFAULT_BUCKETS, Metrics
+from app.main import app
+
+def test_histograms_render_cumulative_buckets():
+    metrics = Metrics(enabled=True)
+    metrics.describe("stage_duration_seconds", "Time spent per stage")
+    with metrics.time("detect"):
+        pass
+    metrics.observe("stage_duration_seconds", 0.003, stage="detect")
+    metrics.observe("stage_duration_seconds", 100.0, stage="detect")
+
+    lines = metrics.render().splitlines()
+    assert "# HELP stage_duration_seconds Time spent per stage" in lines
+    assert "# TYPE stage_duration_seconds histogram" in lines
+    buckets = [line for line in lines if line.startswith("stage_duration_seconds_bucket")]
+    assert len(buckets) == len(DEFAULT_BUCKETS) + 1
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1] == 'stage_duration_seconds_bucket{stage="detect",le="+Inf"} 3'
+    assert 'stage_duration_seconds_count{stage="detect"} 3' in lines
+
+def test_counters_and_gauges():
+    metrics = Metrics(enabled=True)
+    metrics.inc("findings_total", finding_type="phone")
+    metrics.inc("findings_total", 2, finding_type="phone")
+    metrics.register_gauge("queue_size", "Queued replies", lambda: {(): 7})
+    metrics.register_gauge("broken", "Raises at scrape time", lambda: 1 / 0)
+
+    lines = metrics.render().splitlines()
+    assert 'findings_total{finding_type="phone"} 3' in lines
+    assert "# TYPE queue_size gauge" in lines
+    assert "queue_size 7" in lines
+    assert not any(line.startswith("# TYPE broken") for line in lines)
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    with metrics.time("detect"):
+        pass
+    metrics.inc("findings_total")
+    assert metrics.render() == "\n"
+
+def test_metrics_endpoint_is_off_when_disabled():
+    assert TestClient(app).get("/metrics").status_code == 404
\ No newline at end of file
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import uuid
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "migrate_vault_secure_ids.py")
+
+def _legacy_database(path, links):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE vault_entries (id INTEGER PRIMARY KEY, created_at DATETIME, updated_at DATETIME, "
+        "message_id INTEGER UNIQUE, conversation_id VARCHAR, user_id VARCHAR, original_message VARCHAR, "
+        "vault_link VARCHAR UNIQUE, is_archived BOOLEAN, entry_metadata JSON)"
+    )
+    connection.executemany(
+        "INSERT INTO vault_entries (id, message_id, vault_link, is_archived) VALUES (?, ?, ?, 0)",
+        [(i + 1, i + 1, link) for i, link in enumerate(links)]
+    )
+    connection.commit()
+    connection.close()
+
+def _run(path, *args):
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+    return subprocess.run([sys.executable, SCRIPT, *args], env=env, capture_output=True, text=True)
+
+def _secure_ids(path):
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT id, secure_id, vault_link FROM vault_entries ORDER BY id").fetchall()
+    connection.close()
+    return rows
+
+def test_standalone_run_backfills_from_links_and_clears_them(tmp_path):
+    path = tmp_path / "legacy.db"
+    token = uuid.uuid4()
+    _legacy_database(path, [f"https://vault.example.com/view/{token}", "not-a-link", None])
+
+    result = _run(path, "--clear-links", "--batch-size", "2")
+    assert result.returncode == 0, result.stderr
+
+    rows = _secure_ids(path)
+    assert all(secure_id is not None for _, secure_id, _ in rows)
+    assert uuid.UUID(rows[0][1]) == token
+    assert len({secure_id for _, secure_id, _ in rows}) == 3
+    assert all(vault_link is None for _, _, vault_link in rows)
+
+def test_rerun_is_idempotent_and_never_reuses_a_taken_uuid(tmp_path):
+    path = tmp_path / "legacy.db"
+    token = uuid.uuid4()
+    _legacy_database(path, [f"https://vault.example.com/view/{token}"])
+    assert _run(path).returncode == 0
+    first = _secure_ids(path)
+
+    # A row added later whose link points at an already assigned UUID
+    connection = sqlite3.connect(path)
+    connection.execute("INSERT INTO vault_entries (id, message_id, vault_link, is_archived) VALUES (2, 2, ?, 0)", (f"https://x/{token}/",))
+    connection.commit()
+    connection.close()
+
+    assert _run(path).returncode == 0
+    rows = _secure_ids(path)
+    assert rows[0] == first[0]
+    assert rows[1][1] is not None and rows[1][1] != rows[0][1]
\ No newline at end of file
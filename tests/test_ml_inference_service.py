@@ -0,0 +1,77 @@
+import asyncio
+import os
+import subprocess
+import sys
+from app.services import ml_inference_service as ml_module
+from app.services.detection_service import DetectionService
+from app.services.ml_inference_service import MLInferenceService
+from app.services.training_service import TrainingService
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_ml_detection_is_off_by_default():
+    env = {key: value for key, value in os.environ.items() if key != "ENABLE_ML_DETECTION"}
+    output = subprocess.run(
+        [sys.executable, "-c", "from app.core.config import settings; print(settings.ENABLE_ML_DETECTION)"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "False"
+
+async def test_missing_model_version_leaves_ml_off(monkeypatch):
+    monkeypatch.setattr(ml_module.settings, "ENABLE_ML_DETECTION", True)
+    monkeypatch.setattr(ml_module.settings, "MODEL_VERSION", "never-trained")
+    # Would let the untrained base model "load" without torch installed
+    monkeypatch.setattr(TrainingService, "predict_proba", lambda self, texts: [0.0] * len(texts))
+    service = MLInferenceService()
+    await service.start()
+    try:
+        # Loading gives up instead of starting the batch loop
+        await asyncio.wait_for(service._task, timeout=10)
+        assert not service.running
+        assert service.training_service is None
+        assert service.status()["ready"] is False
+        assert await service.classify("call 555-123-4567") is None
+    finally:
+        await service.stop()
+
+def test_ml_findings_do_not_affect_masking():
+    detection_service = DetectionService()
+    text = "call 555-123-4567 about the invoice"
+    findings = detection_service.detect_sensitive_data(text)
+    masked = detection_service.mask_sensitive_data(text, findings)
+
+    ml_finding = MLInferenceService().build_finding(text, 0.99)
+    assert detection_service.mask_sensitive_data(text, findings + [ml_finding]) == masked
+    assert detection_service.mask_sensitive_data(text, [ml_finding]) == text
+
+
+class FakeClassifier:
+    current_version = "test"
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, texts):
+        self.batches.append(list(texts))
+        return [len(text) / 100 for text in texts]
+
+async def test_concurrent_texts_are_classified_in_micro_batches(monkeypatch):
+    monkeypatch.setattr(ml_module.settings, "ML_BATCH_MAX_SIZE", 4)
+    monkeypatch.setattr(ml_module.settings, "ML_BATCH_MAX_WAIT_MS", 50)
+    service = MLInferenceService()
+    classifier = FakeClassifier()
+    monkeypatch.setattr(service, "_load_model", lambda: classifier)
+    monkeypatch.setattr(ml_module.settings, "ENABLE_ML_DETECTION", True)
+    await service.start()
+    try:
+        for _ in range(500):
+            if service.running:
+                break
+            await asyncio.sleep(0.01)
+        texts = ["x" * length for length in range(1, 6)]
+        probabilities = await asyncio.gather(*(service.classify(text) for text in texts))
+    finally:
+        await service.stop()
+
+    assert probabilities == [len(text) / 100 for text in texts]
+    assert [len(batch) for batch in classifier.batches] == [4, 1]
\ No newline at end of file
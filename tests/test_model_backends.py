@@ -0,0 +1,74 @@
+import pytest
+from app.services.model_backends import OnnxBackend, export_quantized, load_backend
+from app.services.training_service import TrainingService
+
+class FakeTokenizer:
+    def __init__(self):
+        self.return_tensors = []
+
+    def __call__(self, texts, return_tensors, **kwargs):
+        self.return_tensors.append(return_tensors)
+        return {"input_ids": texts}
+
+class FakeBackend:
+    return_tensors = "np"
+
+    def predict_proba(self, inputs):
+        return [0.25] * len(inputs["input_ids"])
+
+def test_predict_proba_tokenizes_for_the_backend():
+    # The onnx path must work without torch installed
+    training_service = TrainingService(architecture="bert-base")
+    training_service.tokenizer = FakeTokenizer()
+    training_service._backend = FakeBackend()
+    assert training_service.predict_proba(["a", "b"]) == [0.25, 0.25]
+    assert training_service.tokenizer.return_tensors == ["np"]
+
+class FakeSession:
+    def __init__(self, logits):
+        self.logits = logits
+        self.feeds = []
+
+    def run(self, output_names, feed):
+        self.feeds.append(feed)
+        return [self.logits]
+
+def test_onnx_backend_uses_numpy_only():
+    np = pytest.importorskip("numpy")
+    backend = OnnxBackend.__new__(OnnxBackend)
+    backend.session = FakeSession(np.array([[0.0, 0.0], [0.0, np.log(3.0)]], dtype=np.float32))
+    backend.input_names = ["input_ids", "attention_mask"]
+    inputs = {"input_ids": np.zeros((2, 3), dtype=np.int64), "attention_mask": np.ones((2, 3), dtype=np.int64)}
+
+    assert backend.predict_proba(inputs) == pytest.approx([0.5, 0.75])
+    assert backend.session.feeds[0]["input_ids"] is inputs["input_ids"]
+
+class TinyOutput:
+    def __init__(self, logits):
+        self.logits = logits
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+if torch is not None:
+    # Module level, since export_quantized pickles the model class
+    class TinyClassifier(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.linear = torch.nn.Linear(4, 2)
+
+        def forward(self, input_ids):
+            return TinyOutput(self.linear(input_ids))
+
+@pytest.mark.skipif(torch is None, reason="torch is not installed")
+def test_quantized_export_loads_without_the_fp32_model(tmp_path):
+    export_quantized(TinyClassifier(), str(tmp_path))
+
+    def no_fp32_model():
+        raise AssertionError("the fp32 model should not be built")
+
+    backend = load_backend("quantized", str(tmp_path), no_fp32_model)
+    probabilities = backend.predict_proba({"input_ids": torch.ones(3, 4)})
+    assert len(probabilities) == 3
\ No newline at end of file
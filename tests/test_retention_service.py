@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import delete, func, select
+from app.core.database import AsyncSessionLocal
+from app.models.detection import DetectionFinding
+from app.models.message import Message
+from app.models.training import TrainingData
+from app.models.vault import VaultEntry, VaultFeedback
+from app.services.retention_service import RetentionService
+
+@pytest.fixture
+async def db(tables):
+    async with AsyncSessionLocal() as session:
+        for model in (VaultFeedback, VaultEntry, TrainingData, DetectionFinding, Message):
+            await session.execute(delete(model))
+        await session.commit()
+        yield session
+
+def _message(name: str, age_days: int) -> Message:
+    return Message(
+        intercom_message_id=name,
+        conversation_id="c1",
+        original_text="call 555-123-4567",
+        created_at=datetime.utcnow() - timedelta(days=age_days)
+    )
+
+async def _count(db, column, *criteria) -> int:
+    return (await db.execute(select(func.count(column)).where(*criteria))).scalar()
+
+async def test_purge_removes_findings_of_purged_messages(db, monkeypatch):
+    old, recent, kept = _message("old", 400), _message("recent", 1), _message("kept", 400)
+    for message in (old, recent, kept):
+        message.findings.append(DetectionFinding(finding_type="phone", original_value="555-123-4567"))
+    db.add_all([old, recent, kept])
+    await db.flush()
+    # Still linked to a vault entry, so the message and its findings stay
+    db.add(VaultEntry(message_id=kept.id, conversation_id="c1", created_at=datetime.utcnow()))
+    await db.commit()
+
+    service = RetentionService()
+    monkeypatch.setattr(service, "mode", "purge")
+    monkeypatch.setattr(service, "retention_days", 30)
+    monkeypatch.setattr(service, "chunk_delay", 0)
+    report = await service.run_once()
+
+    assert "error" not in report
+    assert report["messages"] == 1
+    assert await _count(db, Message.id, Message.id == old.id) == 0
+    assert await _count(db, DetectionFinding.id, DetectionFinding.message_id == old.id) == 0
+    assert await _count(db, DetectionFinding.id) == 2
+
+async def test_purge_walks_messages_in_chunks_past_kept_ones(db, monkeypatch):
+    messages = [_message(f"old-{i}", 400) for i in range(5)]
+    db.add_all(messages)
+    await db.flush()
+    # Kept messages at the start of the id range must not stall later chunks
+    db.add(TrainingData(message_id=messages[0].id, label="phone"))
+    db.add(VaultEntry(message_id=messages[1].id, conversation_id="c1", created_at=datetime.utcnow()))
+    await db.commit()
+
+    service = RetentionService()
+    monkeypatch.setattr(service, "mode", "purge")
+    monkeypatch.setattr(service, "retention_days", 30)
+    monkeypatch.setattr(service, "chunk_size", 2)
+    monkeypatch.setattr(service, "chunk_delay", 0)
+    report = await service.run_once()
+
+    assert "error" not in report
+    assert report["messages"] == 3
+    assert await _count(db, Message.id) == 2
\ No newline at end of file
@@ -0,0 +1,52 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import pytest
+from app.api.api_v1.endpoints.intercom import verify_intercom_signature
+from app.core.config import settings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _load_script(name: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, "scripts", f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_benchmark_reports_every_combination(tmp_path):
+    output = tmp_path / "benchmark.json"
+    subprocess.run(
+        [sys.executable, "scripts/benchmark_detection.py", "--sizes", "10", "--densities", "0,1",
+         "--sentences", "3", "--repeat", "1", "--output", str(output)],
+        cwd=REPO_ROOT, env=dict(os.environ), capture_output=True, check=True
+    )
+    report = json.loads(output.read_text())
+    assert [(result["messages"], result["finding_density"]) for result in report["results"]] == [(10, 0.0), (10, 1.0)]
+    assert report["results"][0]["total_findings"] == 0
+    assert report["results"][1]["total_findings"] > 0
+    assert all(result["detect"]["messages_per_second"] > 0 for result in report["results"])
+    assert all(result["scan_speedup"] > 0 for result in report["results"])
+
+def test_load_test_payloads_pass_the_signature_check():
+    pytest.importorskip("uvicorn")
+    load_test = _load_script("load_test_webhook")
+    payloads = load_test.build_payloads(5, density=0.5, topic="conversation.replied")
+    assert len(payloads) == 5
+    for body in payloads:
+        assert verify_intercom_signature(body, load_test.sign(body, settings.INTERCOM_ACCESS_TOKEN))
+    assert load_test.percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert load_test.percentile([], 99) is None
+
+def test_load_test_stub_rate_limits_replies():
+    pytest.importorskip("uvicorn")
+    from fastapi.testclient import TestClient
+
+    load_test = _load_script("load_test_webhook")
+    client = TestClient(load_test.create_stub_app(latency_ms=0, jitter_ms=0, rate_limit=2, error_rate=0))
+    statuses = [client.post("/conversations/c1/reply", json={"body": "hi"}).status_code for _ in range(3)]
+    # The third request may land in a new one-second window
+    assert statuses[:2] == [200, 200]
+    assert statuses[2] in (200, 429)
+    assert client.get("/_stats").json()["replies"] == 3
\ No newline at end of file
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+from app.services.training_service import TrainingService
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+import json
+from fastapi.testclient import TestClient
+from app.main import app
+
+with TestClient(app) as client:
+    print(json.dumps(client.get("/startup-report").json()))
+"""
+
+def test_startup_does_not_load_ml_modules():
+    # A fresh interpreter, since other tests may have imported torch already
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=REPO_ROOT, env=dict(os.environ), capture_output=True, text=True, check=True
+    ).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    assert report["ml_modules_loaded"] == []
+    assert report["ml_inference"] == {"enabled": False, "ready": False, "load_seconds": None}
+    assert report["ready_seconds"] >= report["imports_seconds"]
+
+def test_training_service_loads_the_model_on_first_use():
+    training_service = TrainingService(architecture="bert-base")
+    assert training_service._model is None
+    assert training_service._tokenizer is None
\ No newline at end of file
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import delete
+from app.core.database import AsyncSessionLocal
+from app.models.stats import DetectionStatsHourly, FindingStatsHourly
+from app.services.stats_service import StatsService
+
+@pytest.fixture
+async def db(tables):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(FindingStatsHourly))
+        await session.execute(delete(DetectionStatsHourly))
+        await session.commit()
+        yield session
+
+async def test_flushes_add_up_in_the_rollups(db):
+    service = StatsService()
+    phone = {"finding_type": "phone"}
+    email = {"finding_type": "email"}
+
+    service.record_message([phone, email], blocked=True, processing_time=0.2)
+    service.record_message([], blocked=False, processing_time=0.1)
+    await service.flush()
+    # A second flush upserts into the same rows
+    service.record_message([phone], blocked=False, processing_time=0.3)
+    await service.flush()
+
+    stats = await service.get_stats(db, hours=2)
+    assert stats["total_messages_processed"] == 3
+    assert stats["total_sensitive_data_found"] == 3
+    assert stats["blocked_messages"] == 1
+    assert stats["detection_types"] == {"phone": 2, "email": 1}
+    assert stats["avg_processing_time"] == pytest.approx(0.2)
+    assert sum(hour["messages_processed"] for hour in stats["hourly"]) == 3
+
+async def test_failed_flush_keeps_counts(db, monkeypatch):
+    service = StatsService()
+    service.record_message([{"finding_type": "phone"}], blocked=False, processing_time=0.1)
+
+    async def broken_add_bucket(*args):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(service, "_add_bucket", broken_add_bucket)
+    await service.flush()
+    monkeypatch.undo()
+    await service.flush()
+
+    stats = await service.get_stats(db)
+    assert stats["total_messages_processed"] == 1
+    assert stats["detection_types"] == {"phone": 1}
+
+async def test_empty_stats(db):
+    stats = await StatsService().get_stats(db)
+    assert stats["total_messages_processed"] == 0
+    assert stats["hourly"] == []
\ No newline at end of file
@@ -0,0 +1,79 @@
+import pytest
+from app.core.database import SessionLocal
+from app.models.detection import DetectionFinding
+from app.models.message import Message
+from app.models.training import TrainingData
+from app.models.vault import VaultEntry, VaultFeedback
+from app.services.training_service import TrainingService
+
+@pytest.fixture
+def db(tables):
+    with SessionLocal() as session:
+        for model in (VaultFeedback, VaultEntry, TrainingData, DetectionFinding, Message):
+            session.query(model).delete()
+        session.commit()
+        yield session
+
+async def test_prepare_training_data_uses_validated_labels(db):
+    examples = [
+        ("ssn 123-45-6789", "sensitive", True),
+        ("hello there", "not_sensitive", True),
+        ("card 4111 1111 1111 1111", "1", True),
+        ("unreviewed", "sensitive", False)
+    ]
+    for i, (text, label, is_validated) in enumerate(examples):
+        message = Message(intercom_message_id=f"train{i}", conversation_id="c1", original_text=text)
+        db.add(TrainingData(message=message, label=label, is_validated=is_validated))
+    db.commit()
+
+    data = await TrainingService(architecture="tfidf").prepare_training_data(db)
+    assert data == [
+        {"text": "ssn 123-45-6789", "label": 1},
+        {"text": "hello there", "label": 0},
+        {"text": "card 4111 1111 1111 1111", "label": 1}
+    ]
+
+
+async def test_evaluate_model_runs_length_bucketed_batches(db, monkeypatch):
+    texts = ["x" * length for length in (9, 1, 5, 3, 7)]
+    for i, text in enumerate(texts):
+        db.add(Message(intercom_message_id=f"eval{i}", conversation_id="c1", original_text=text, is_blocked=len(text) > 4))
+    training_message = Message(intercom_message_id="eval-train", conversation_id="c1", original_text="used for training")
+    db.add(TrainingData(message=training_message, label="sensitive", is_validated=True))
+    # A training row without a message must not hide every message from evaluation
+    db.add(TrainingData(message_id=None, label="sensitive", is_validated=True))
+    db.commit()
+
+    batches = []
+
+    def predict_proba(batch):
+        batches.append(batch)
+        return [1.0 if len(text) > 4 else 0.0 for text in batch]
+
+    training_service = TrainingService(architecture="tfidf")
+    monkeypatch.setattr(training_service, "predict_proba", predict_proba)
+    result = await training_service.evaluate_model(db, batch_size=2)
+
+    assert result["total_samples"] == 5
+    assert result["accuracy"] == 1.0
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [len(text) for batch in batches for text in batch] == [1, 3, 5, 7, 9]
+
+
+async def test_tfidf_model_trains_saves_and_loads(tmp_path, monkeypatch):
+    pytest.importorskip("sklearn")
+    monkeypatch.chdir(tmp_path)
+    training_data = [
+        {"text": f"my ssn is {i:03d}-45-6789", "label": 1} for i in range(10)
+    ] + [
+        {"text": f"thanks for the help with ticket {i}", "label": 0} for i in range(10)
+    ]
+    trainer = TrainingService(architecture="tfidf")
+    trainer.current_version = "tfidf-test"
+    await trainer.train_model(training_data)
+
+    loaded = TrainingService()
+    loaded.load_version("tfidf-test")
+    assert loaded.model_type == "tfidf"
+    sensitive, clean = loaded.predict_proba(["my ssn is 999-45-6789", "thanks for the help"])
+    assert sensitive > 0.5 > clean
\ No newline at end of file
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import csv
+import io
+import json
+import uuid
+import pytest
+from sqlalchemy import delete, func, select
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.message import Message
+from app.models.vault import VaultEntry, VaultFeedback
+from app.services.vault_service import VaultService
+
+@pytest.fixture
+async def db(tables):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(VaultFeedback))
+        await session.execute(delete(VaultEntry))
+        await session.execute(delete(Message))
+        await session.commit()
+        yield session
+
+async def _add_messages(db, count: int):
+    messages = [
+        Message(intercom_message_id=f"user{i}_msg{i}", conversation_id="c1", original_text=f"text {i}")
+        for i in range(count)
+    ]
+    db.add_all(messages)
+    await db.commit()
+    return messages
+
+async def test_messages_without_entry_ignore_null_message_ids(db):
+    messages = await _add_messages(db, 3)
+    service = VaultService()
+    await service.create_vault_entries_bulk(db, messages[:1])
+    # An entry whose message was purged keeps a NULL message_id
+    db.add(VaultEntry(message_id=None, conversation_id="c1", original_message="orphan"))
+    await db.commit()
+
+    found = await service.get_messages_without_vault_entry(db, [message.id for message in messages])
+    assert [message.id for message in found] == [message.id for message in messages[1:]]
+
+async def test_bulk_create_returns_ids_in_message_order(db):
+    messages = await _add_messages(db, 5)
+    entry_ids = await VaultService().create_vault_entries_bulk(db, messages, batch_size=2)
+    rows = (await db.execute(select(VaultEntry.id, VaultEntry.message_id).order_by(VaultEntry.id))).all()
+    assert entry_ids == [row.id for row in rows]
+    assert [row.message_id for row in rows] == [message.id for message in messages]
+
+async def test_bulk_create_failure_leaves_no_entries(db):
+    messages = await _add_messages(db, 3)
+    # The repeated message violates the unique message_id in the last batch
+    with pytest.raises(Exception):
+        await VaultService().create_vault_entries_bulk(db, messages + messages[:1], batch_size=3)
+    assert (await db.execute(select(func.count(VaultEntry.id)))).scalar() == 0
+
+async def test_keyset_pages_cover_every_entry_once(db):
+    created_at = datetime(2024, 1, 1)
+    # Shared timestamps make the id tiebreaker matter
+    db.add_all([
+        VaultEntry(conversation_id="c1", original_message=f"m{i}", created_at=created_at + timedelta(minutes=i // 3))
+        for i in range(10)
+    ])
+    await db.commit()
+    service = VaultService()
+
+    seen, cursor = [], None
+    while True:
+        entries, cursor = await service.list_vault_entries(db, cursor=cursor, page_size=4)
+        seen.extend((entry.created_at, entry.id) for entry in entries)
+        if cursor is None:
+            break
+    assert len(seen) == 10
+    assert seen == sorted(seen, reverse=True)
+
+async def test_malformed_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        await VaultService().list_vault_entries(db, cursor="not-a-cursor")
+
+
+async def _collect(service, **filters) -> str:
+    return "".join([chunk async for chunk in service.export_vault_entries(**filters)])
+
+async def test_export_streams_ndjson_and_csv_in_batches(db, monkeypatch):
+    monkeypatch.setattr(settings, "VAULT_EXPORT_BATCH_SIZE", 2)
+    db.add_all([
+        VaultEntry(conversation_id="c1" if i % 2 else "c2", original_message=f"m{i}", secure_id=uuid.uuid4())
+        for i in range(5)
+    ])
+    await db.commit()
+    service = VaultService()
+
+    chunks = [chunk async for chunk in service.export_vault_entries()]
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert len(chunks) == 3
+    assert [line["original_message"] for line in lines] == [f"m{i}" for i in range(5)]
+    assert lines[0]["vault_link"] == service.build_vault_link(uuid.UUID(lines[0]["secure_id"]))
+
+    rows = list(csv.reader(io.StringIO(await _collect(service, export_format="csv", conversation_id="c1"))))
+    assert rows[0] == list(VaultService.EXPORT_FIELDS)
+    assert [row[rows[0].index("original_message")] for row in rows[1:]] == ["m1", "m3"]
\ No newline at end of file